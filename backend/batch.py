@@ -0,0 +1,227 @@
+"""Batch extraction for many applicants at once.
+
+A manifest is a directory, or a zip, of applicant folders:
+
+    manifest/
+        A1001/aadhaar.jpg
+        A1001/pan.pdf
+        A1002/passport.png
+
+Every folder that directly holds documents is one applicant, identified by
+its path inside the manifest. Applicants run on the shared batch pool and one
+JSON line per applicant is appended to the output as it finishes, followed by
+a throughput summary. The output doubles as the checkpoint: re-running with
+the same output skips applicants already extracted and retries failed ones.
+
+    python batch.py applicants.zip --output results.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from config import BATCH_WORKERS, MAX_DOCUMENT_BYTES, OCR_MAX_WORKERS
+from extractor import extract_document, file_sha256, merge_data
+from models import ExtractedData
+from workers import batch_executor, ocr_limiter
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png')
+
+
+def _is_document(name: str) -> bool:
+    base = os.path.basename(name)
+    return not base.startswith('.') and os.path.splitext(base)[1].lower() in DOCUMENT_EXTENSIONS
+
+
+def _group_by_applicant(names: List[str]) -> Dict[str, List[str]]:
+    applicants: Dict[str, List[str]] = {}
+    for name in sorted(names):
+        applicant = os.path.dirname(name).strip('/')
+        if not applicant:
+            logger.warning(f"⚠️  Skipping {name}: documents must be inside an applicant folder")
+            continue
+        applicants.setdefault(applicant, []).append(name)
+    return applicants
+
+
+def scan_directory(root: str) -> Dict[str, List[str]]:
+    """Applicant id -> document paths"""
+    names = []
+    for dirpath, _, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        names.extend(os.path.join('' if rel == '.' else rel, f).replace(os.sep, '/')
+                     for f in filenames if _is_document(f))
+    return {applicant: [os.path.join(root, name) for name in docs]
+            for applicant, docs in _group_by_applicant(names).items()}
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Applicants already extracted into output_path"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interrupted run
+            if record.get('status') == 'ok':
+                done.add(record['applicant'])
+    return done
+
+
+def extract_applicant(applicant: str, paths: List[str], cleanup_dir: Optional[str] = None,
+                      limiter: Optional[threading.Semaphore] = None) -> Dict:
+    """Extract and merge one applicant's documents (blocking, runs on the batch pool)"""
+    start = time.perf_counter()
+    documents = []
+    extracted = []
+    try:
+        for path in paths:
+            doc = {'file': os.path.basename(path), 'sha256': '', 'status': 'ok', 'error': ''}
+            try:
+                doc['sha256'] = file_sha256(path)
+                data = extract_document(path, None, doc['sha256'], limiter)
+                if data is None:
+                    doc['status'] = 'empty'
+                else:
+                    extracted.append(data)
+            except Exception as e:
+                logger.error(f"❌ {applicant}/{doc['file']}: {e}")
+                doc['status'] = 'failed'
+                doc['error'] = str(e)
+            documents.append(doc)
+    finally:
+        if cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+    final_data = merge_data(extracted) if extracted else ExtractedData()
+    return {
+        'applicant': applicant,
+        'status': 'ok' if extracted else 'failed',
+        'documents': documents,
+        'extractedData': final_data.dict(),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def _iter_jobs(manifest: str, done: Set[str], workdir: str) -> Iterator[Tuple[str, List[str], Optional[str]]]:
+    """(applicant, document paths, directory to delete afterwards) for each pending applicant"""
+    if os.path.isdir(manifest):
+        for applicant, paths in scan_directory(manifest).items():
+            if applicant not in done:
+                yield applicant, paths, None
+        return
+
+    # Zip members are unpacked one applicant at a time, just before it is queued
+    with zipfile.ZipFile(manifest) as archive:
+        members = {info.filename: info for info in archive.infolist()
+                   if not info.is_dir() and _is_document(info.filename)}
+        for index, (applicant, names) in enumerate(_group_by_applicant(list(members)).items()):
+            if applicant in done:
+                continue
+            target = os.path.join(workdir, str(index))
+            os.makedirs(target)
+            paths = []
+            for name in names:
+                info = members[name]
+                if info.file_size > MAX_DOCUMENT_BYTES:
+                    logger.warning(f"⚠️  Skipping {name}: {info.file_size} bytes exceeds {MAX_DOCUMENT_BYTES}")
+                    continue
+                path = os.path.join(target, os.path.basename(name))
+                with archive.open(info) as src, open(path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                paths.append(path)
+            yield applicant, paths, target
+
+
+def run_batch(manifest: str, output_path: str, resume: bool = True,
+              max_in_flight: int = BATCH_WORKERS * 2,
+              limiter: Optional[threading.Semaphore] = None) -> Iterator[Dict]:
+    """Extract every applicant in manifest, appending JSON lines to output_path.
+
+    Yields each applicant record as it completes (in completion order), then
+    {'summary': {...}}. At most max_in_flight applicants are queued or running,
+    so a large zip is never unpacked all at once. All applicants share limiter
+    (one request's share of the OCR pool unless given).
+    """
+    limiter = limiter or ocr_limiter()
+    done = load_checkpoint(output_path) if resume else set()
+    if done:
+        logger.info(f"⏩ Resuming: {len(done)} applicant(s) already extracted")
+
+    counts = {'ok': 0, 'failed': 0, 'documents': 0}
+    start = time.perf_counter()
+    pending = set()
+
+    with tempfile.TemporaryDirectory(prefix='batch-') as workdir, \
+            open(output_path, 'a' if resume else 'w') as out:
+
+        def finish(futures) -> Iterator[Dict]:
+            for future in futures:
+                record = future.result()
+                counts[record['status']] += 1
+                counts['documents'] += len(record['documents'])
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                yield record
+
+        for applicant, paths, cleanup_dir in _iter_jobs(manifest, done, workdir):
+            if len(pending) >= max_in_flight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finish(finished)
+            pending.add(batch_executor.submit(extract_applicant, applicant, paths, cleanup_dir, limiter))
+
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finish(finished)
+
+    seconds = time.perf_counter() - start
+    processed = counts['ok'] + counts['failed']
+    summary = {
+        'applicants': processed + len(done),
+        'processed': processed,
+        'skipped': len(done),
+        'ok': counts['ok'],
+        'failed': counts['failed'],
+        'documents': counts['documents'],
+        'seconds': round(seconds, 3),
+        'applicantsPerSecond': round(processed / seconds, 3) if seconds else 0.0,
+        'documentsPerSecond': round(counts['documents'] / seconds, 3) if seconds else 0.0,
+    }
+    logger.info(f"📦 Batch done: {processed} applicant(s), {counts['documents']} document(s) "
+                f"in {seconds:.1f}s ({summary['applicantsPerSecond']} applicants/s)")
+    yield {'summary': summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract many applicants' documents into JSON Lines")
+    parser.add_argument("manifest", help="directory or zip of applicant folders")
+    parser.add_argument("--output", "-o", required=True, help="JSON Lines output, also the resume checkpoint")
+    parser.add_argument("--no-resume", action="store_true", help="start over instead of skipping done applicants")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # Run from the command line, the batch has the whole OCR pool to itself
+    records = run_batch(args.manifest, args.output, resume=not args.no_resume,
+                        limiter=ocr_limiter(OCR_MAX_WORKERS))
+    for record in records:
+        if 'summary' in record:
+            print(json.dumps(record['summary'], indent=2))
+        else:
+            print(f"{record['status']:>6}  {record['applicant']}  ({record['seconds']}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
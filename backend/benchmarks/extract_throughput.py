@@ -0,0 +1,84 @@
+"""
+extract_complete_data throughput on synthetic OCR text.
+
+    python benchmarks/extract_throughput.py --documents 500
+
+Run from the backend directory. Prints documents per second for the
+regex extraction pass alone (no tesseract involved).
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractor import get_extractor
+
+FIRST_NAMES = ["Anitha", "Ravi", "Priya", "Karthik", "Meena", "Suresh", "Lakshmi", "Arun"]
+LAST_NAMES = ["Kumar", "Sharma", "Raman", "Iyer", "Nair", "Reddy", "Patel", "Das"]
+CITIES = ["Chennai", "Madurai", "Coimbatore", "Bengaluru", "Pune", "Kochi"]
+NOISE = ["Government of India", "|| ~~ ..", "Unique Identification Authority", "SIGNATURE", "ll1I|"]
+
+
+def synthetic_aadhaar(rng: random.Random) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    father = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    number = " ".join(str(rng.randint(2000, 5999)) for _ in range(3))
+    return (
+        f"{rng.choice(NOISE)}\nTo\n{name}\nS/O {father}\n"
+        f"No 12/4, Gandhi Nagar Main Road, {rng.choice(CITIES)}, Tamil Nadu - 6{rng.randint(10000, 99999)}\n"
+        f"DOB: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}\n"
+        f"{rng.choice(['MALE', 'FEMALE'])}\nMobile: 9{rng.randint(100000000, 999999999)}\n"
+        f"{number}\n{rng.choice(NOISE)}\n"
+    )
+
+
+def synthetic_pan(rng: random.Random) -> str:
+    name = f"{rng.choice(LAST_NAMES).upper()} {rng.choice(FIRST_NAMES).upper()}"
+    pan = "".join(rng.choice("ABCDEFGHJK") for _ in range(3)) + "P" + rng.choice("ABCDE")
+    pan += f"{rng.randint(1000, 9999)}" + rng.choice("ABCDEFGH")
+    return (
+        f"INCOME TAX DEPARTMENT\nGOVT. OF INDIA\nPermanent Account Number Card\n{pan}\n"
+        f"Name\n{name}\nFather's Name\n{rng.choice(FIRST_NAMES).upper()} {rng.choice(LAST_NAMES).upper()}\n"
+        f"Date of Birth\n{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}\n"
+    )
+
+
+def build_corpus(documents: int, variants: int, seed: int) -> list:
+    """Each document mimics cascade output: several OCR variants joined with ===SPLIT==="""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(documents):
+        make = rng.choice([synthetic_aadhaar, synthetic_pan])
+        base = make(rng)
+        texts = [f"[V{i}_OEM3_PSM6]\n{base}" for i in range(variants)]
+        corpus.append("\n===SPLIT===\n".join(texts))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--variants", type=int, default=8, help="OCR variants per document")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    corpus = build_corpus(args.documents, args.variants, args.seed)
+    extractor = get_extractor()
+    
+    start = time.perf_counter()
+    for text in corpus:
+        extractor.extract_complete_data(text)
+    elapsed = time.perf_counter() - start
+    
+    total_kb = sum(len(t) for t in corpus) / 1024
+    print(f"{args.documents} documents ({total_kb:.0f} KB) in {elapsed:.2f}s "
+          f"-> {args.documents / elapsed:.1f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
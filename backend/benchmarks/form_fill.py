@@ -0,0 +1,97 @@
+"""
+Web form fields filled per second, on the local sample forms.
+
+    python benchmarks/form_fill.py --rounds 20
+
+Run from the backend directory. Each round loads every sample-forms/*.html
+page in a pooled browser context and fills it with fill_standard_form; a
+generated Google-Forms-style page (role="listitem" questions) exercises
+fill_google_form the same way. Page loads are excluded from the timing.
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_pool import browser_pool
+from config import SAMPLE_FORMS_DIR
+from filler import fill_google_form, fill_standard_form
+
+DATA = {
+    'name': 'Ravi Kumar',
+    'fatherName': 'Suresh Kumar',
+    'dateOfBirth': '01/02/1990',
+    'gender': 'Male',
+    'address': '12 Gandhi Road',
+    'city': 'Chennai',
+    'state': 'Tamil Nadu',
+    'pincode': '600001',
+    'phone': '9876543210',
+    'email': 'ravi@example.com',
+    'idNumber': '1234 5678 9012',
+}
+
+GOOGLE_QUESTIONS = ["Full name", "Father's name", "Date of birth", "Gender", "Address", "City",
+                    "State", "PIN code", "Mobile number", "Email", "Aadhaar number"]
+
+
+def google_form_html() -> str:
+    items = "".join(
+        f'<div role="listitem"><div>{q}</div><input type="text" aria-label="{q}"></div>'
+        for q in GOOGLE_QUESTIONS
+    )
+    return f"<html><body><form>{items}</form></body></html>"
+
+
+async def bench(url: str, filler, rounds: int) -> tuple:
+    fields = 0
+    seconds = 0.0
+    for _ in range(rounds):
+        async with browser_pool.context() as context:
+            page = await context.new_page()
+            await page.goto(url)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                filled, _ = await filler(page, DATA)
+            seconds += time.perf_counter() - start
+            fields += filled
+    return fields, seconds
+
+
+async def run(rounds: int):
+    await browser_pool.start()
+    google_path = os.path.abspath(os.path.join(SAMPLE_FORMS_DIR, ".google-form-bench.html"))
+    with open(google_path, "w") as f:
+        f.write(google_form_html())
+    
+    try:
+        cases = [(path, fill_standard_form) for path in sorted(glob.glob(os.path.join(SAMPLE_FORMS_DIR, "*.html")))]
+        cases.append((google_path, fill_google_form))
+        
+        total_fields, total_seconds = 0, 0.0
+        for path, filler in cases:
+            fields, seconds = await bench("file://" + os.path.abspath(path), filler, rounds)
+            total_fields += fields
+            total_seconds += seconds
+            print(f"{os.path.basename(path):<28} {fields // rounds:3d} fields/form  {fields / seconds:9.1f} fields/s")
+        print(f"{'total':<28} {total_fields / total_seconds:24.1f} fields/s")
+    finally:
+        os.unlink(google_path)
+        await browser_pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.rounds))
+
+
+if __name__ == "__main__":
+    main()
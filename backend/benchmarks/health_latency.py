@@ -0,0 +1,84 @@
+"""
+/health latency while OCR uploads are running.
+
+Start the API first (uvicorn main:app), then:
+
+    python benchmarks/health_latency.py path/to/id_card.jpg --uploads 4
+
+Prints /health latency percentiles with no load and under load. With
+extraction off the event loop the two should be about the same.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import urllib.request
+import uuid
+
+
+def post_document(base_url: str, image_path: str):
+    boundary = uuid.uuid4().hex
+    with open(image_path, "rb") as f:
+        content = f.read()
+    filename = os.path.basename(image_path)
+    
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="documentType"\r\n\r\nbenchmark\r\n'
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="documents"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    
+    request = urllib.request.Request(
+        f"{base_url}/api/upload-documents",
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    urllib.request.urlopen(request, timeout=600).read()
+
+
+def sample_health(base_url: str, duration: float, interval: float = 0.1) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        urllib.request.urlopen(f"{base_url}/health", timeout=60).read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def report(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"{label:<12} n={len(latencies):<5} median={statistics.median(latencies):8.2f}ms "
+          f"p95={p95:8.2f}ms max={latencies[-1]:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", help="ID image to upload")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=4, help="concurrent upload requests")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    report("idle", sample_health(args.url, args.baseline_seconds))
+    
+    threads = [threading.Thread(target=post_document, args=(args.url, args.image)) for _ in range(args.uploads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    
+    latencies = []
+    while any(t.is_alive() for t in threads):
+        latencies.extend(sample_health(args.url, 1.0))
+    
+    report("under load", latencies)
+    print(f"{args.uploads} uploads finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
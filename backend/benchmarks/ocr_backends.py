@@ -0,0 +1,56 @@
+"""
+OCR calls per second: pytesseract (process per call) vs tesserocr (resident engine).
+
+    python benchmarks/ocr_backends.py id_card.jpg --calls 40 --threads 4
+
+Run from the backend directory. Both backends OCR the same preprocessed
+'otsu' variant with --oem 3 --psm 6.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_backends import PytesseractBackend, TesserocrBackend, tesserocr
+from preprocessing import VariantPipeline
+
+
+def run(backend, image, calls: int, threads: int) -> float:
+    backend.image_to_string(image, 3, 6)  # Warm-up (engine load for tesserocr)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: backend.image_to_string(image, 3, 6), range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image")
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    image = VariantPipeline.from_path(args.image).get("otsu")
+    
+    backends = [PytesseractBackend()]
+    if tesserocr is not None:
+        backends.append(TesserocrBackend())
+    else:
+        print("tesserocr not installed - measuring pytesseract only")
+    
+    for backend in backends:
+        try:
+            rate = run(backend, image, args.calls, args.threads)
+        except Exception as e:  # e.g. no tesseract binary on PATH for pytesseract
+            print(f"{backend.name:<12} unavailable: {e}")
+            continue
+        print(f"{backend.name:<12} {rate:8.2f} calls/s ({args.threads} thread(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+AcroForm fill time: per-field updates (the old fill_pdf loop) vs one cached
+template and one pass per page.
+
+    python benchmarks/pdf_form_fill.py --fields 300 --pages 10 --rounds 5
+
+Run from the backend directory. The form is generated with reportlab: a few
+fields per page carry applicant labels, the rest are unrelated ('Remarks 17').
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.pdfgen import canvas
+
+from pdf_forms import TemplateCache
+
+LABELS = ["Full Name", "Father's Name", "Date of Birth", "Gender", "Address", "City", "State",
+          "PIN Code", "Mobile No", "Email ID", "Aadhaar Number"]
+FILLER = ["Remarks", "Amount", "Reference", "Office Use", "Code", "Signature"]
+
+DATA = {
+    'name': 'Ravi Kumar', 'fatherName': 'Suresh Kumar', 'dateOfBirth': '01/02/1990', 'gender': 'Male',
+    'address': '12 Gandhi Road', 'city': 'Chennai', 'state': 'Tamil Nadu', 'pincode': '600001',
+    'phone': '9876543210', 'email': 'ravi@example.com', 'idNumber': '1234 5678 9012',
+}
+
+
+def build_form(fields: int, pages: int) -> bytes:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    per_page = -(-fields // pages)
+    for index in range(fields):
+        slot = index % per_page
+        name = LABELS[index] if index < len(LABELS) else f"{FILLER[index % len(FILLER)]} {index}"
+        c.acroForm.textfield(name=name, x=40 + 280 * (slot % 2), y=780 - 25 * (slot // 2), width=250, height=18)
+        if slot == per_page - 1 or index == fields - 1:
+            c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def per_field_fill(form: bytes, data: dict) -> bytes:
+    """The previous fill_pdf: every annotation against every key, one update call per match"""
+    reader = PdfReader(io.BytesIO(form))
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    for page in writer.pages:
+        for annot in page.get('/Annots', []):
+            field = annot.get_object()
+            field_name = str(field['/T']).lower()
+            for key, value in data.items():
+                if value and (key.lower() in field_name or field_name in key.lower()):
+                    writer.update_page_form_field_values(page, {field['/T']: str(value)})
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def template_fill(data: dict, cache: TemplateCache, path: str) -> bytes:
+    out = io.BytesIO()
+    cache.get(path).write(data, out)
+    return out.getvalue()
+
+
+def timed(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", type=int, default=300)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    form = build_form(args.fields, args.pages)
+    path = os.path.abspath(".pdf-form-bench.pdf")
+    with open(path, "wb") as f:
+        f.write(form)
+    
+    try:
+        results = [
+            ("per-field updates", timed(lambda: per_field_fill(form, DATA), args.rounds)),
+            ("template, cold", timed(lambda: template_fill(DATA, TemplateCache(), path), args.rounds)),
+        ]
+        warm = TemplateCache()
+        warm.get(path)
+        results.append(("template, cached", timed(lambda: template_fill(DATA, warm, path), args.rounds)))
+    finally:
+        os.unlink(path)
+    
+    print(f"{args.fields} fields on {args.pages} pages")
+    for label, seconds in results:
+        print(f"{label:<20} {seconds * 1000:8.1f} ms/fill  {args.fields / seconds:10.0f} fields/s")
+
+
+if __name__ == "__main__":
+    main()
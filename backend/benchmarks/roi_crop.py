@@ -0,0 +1,65 @@
+"""
+Pixels processed and wall time with and without region-of-interest cropping.
+
+    python benchmarks/roi_crop.py photo1.jpg photo2.jpg
+
+Run from the backend directory. For each image, builds every preprocessing
+variant and OCRs the 'otsu' variant once (when tesseract is installed),
+first on the full frame and then on the detected card/text region.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytesseract
+
+from preprocessing import VariantPipeline
+
+
+def measure(image_path: str, roi: bool, ocr: bool) -> dict:
+    start = time.perf_counter()
+    pipeline = VariantPipeline.from_path(image_path, roi=roi)
+    pixels = 0
+    for _, array in pipeline.iter():
+        pixels += array.shape[0] * array.shape[1]
+    preprocess = time.perf_counter() - start
+    
+    ocr_seconds = 0.0
+    if ocr:
+        start = time.perf_counter()
+        pytesseract.image_to_string(pipeline.get("otsu"), config="--oem 3 --psm 6", lang="eng")
+        ocr_seconds = time.perf_counter() - start
+    
+    return {"base": pipeline.gray.shape, "pixels": pixels, "preprocess": preprocess, "ocr": ocr_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="+")
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    try:
+        pytesseract.get_tesseract_version()
+        ocr = True
+    except Exception:
+        print("tesseract not found - reporting preprocessing only")
+        ocr = False
+    
+    for image_path in args.images:
+        full = measure(image_path, roi=False, ocr=ocr)
+        cropped = measure(image_path, roi=True, ocr=ocr)
+        print(f"{os.path.basename(image_path)}")
+        for label, result in (("full frame", full), ("roi", cropped)):
+            print(f"  {label:<10} base={result['base'][1]}x{result['base'][0]:<6} "
+                  f"variant pixels={result['pixels'] / 1e6:8.1f}M "
+                  f"preprocess={result['preprocess']:6.2f}s ocr(otsu)={result['ocr']:6.2f}s")
+        print(f"  pixels kept: {cropped['pixels'] / full['pixels']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import platform
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Set
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from config import BROWSER_POOL_SIZE, BROWSER_MAX_FILLS, BROWSER_HEADLESS
+
+
+def find_chrome_path():
+    """Find Chrome installation path"""
+    system = platform.system()
+
+    if system == "Windows":
+        paths = [
+            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+            os.path.expanduser(r"~\AppData\Local\Google\Chrome\Application\chrome.exe"),
+        ]
+    elif system == "Darwin":
+        paths = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        paths = [
+            "/usr/bin/google-chrome",
+            "/usr/bin/google-chrome-stable",
+            "/usr/bin/chromium",
+            "/usr/bin/chromium-browser",
+        ]
+
+    for path in paths:
+        if os.path.exists(path):
+            return path
+
+    return None
+
+
+class BrowserPool:
+    """Long-lived Chromium processes shared by every URL fill.
+
+    Browsers are launched once at startup; each fill gets its own
+    BrowserContext (separate cookies, storage and cache), which takes
+    milliseconds instead of the seconds a browser launch costs. Contexts are
+    spread over the browsers least-loaded first, and a semaphore caps how many
+    fills run at once.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_fills: int = BROWSER_MAX_FILLS,
+                 headless: bool = BROWSER_HEADLESS):
+        self.size = max(1, size)
+        self.max_fills = max(1, max_fills)
+        self.headless = headless
+        self.browsers: List[Browser] = []
+        self._playwright = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._releases: Set[asyncio.Task] = set()
+        self._kept: Set[BrowserContext] = set()
+        self.fills = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """Launch the browsers; safe to call again (e.g. lazily from a fill)"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return
+            self._slots = asyncio.Semaphore(self.max_fills)
+            self._playwright = await async_playwright().start()
+            try:
+                self.browsers = [await self._launch() for _ in range(self.size)]
+            except Exception:
+                await self._playwright.stop()
+                self._playwright = None
+                raise
+            mode = "headless" if self.headless else "headful"
+            print(f"Browser pool started: {self.size} {mode} browser(s), {self.max_fills} concurrent fill(s)")
+
+    async def stop(self):
+        # Closing the browsers closes every context, kept ones included
+        await asyncio.gather(*self._releases, return_exceptions=True)
+        self._kept.clear()
+        for browser in self.browsers:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self.browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> Browser:
+        chrome_path = find_chrome_path()
+        return await self._playwright.chromium.launch(
+            headless=self.headless,
+            executable_path=chrome_path,  # None: Playwright's bundled Chromium
+            args=[] if self.headless else ['--start-maximized']
+        )
+
+    async def _pick_browser(self) -> Browser:
+        # Replace browsers that crashed or were closed under us
+        for i, browser in enumerate(self.browsers):
+            if not browser.is_connected():
+                print(f"Browser {i} disconnected, relaunching")
+                self.browsers[i] = await self._launch()
+        return min(self.browsers, key=lambda b: len(b.contexts))
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """An isolated context for one fill.
+
+        The fill slot is freed as soon as the block exits and the context is
+        closed in a background task, so the caller's HTTP response never waits
+        on teardown. A context handed to keep() is left open for its new owner.
+        """
+        if not self.started:
+            await self.start()
+        await self._slots.acquire()
+        try:
+            browser = await self._pick_browser()
+            context = await browser.new_context(viewport={'width': 1920, 'height': 1080})
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self.fills += 1
+        try:
+            yield context
+        finally:
+            self._slots.release()
+            if context in self._kept:
+                self._kept.discard(context)
+            else:
+                self.close_later(context)
+
+    def keep(self, context: BrowserContext):
+        """Leave context open after its fill; the caller must close_later() it"""
+        self._kept.add(context)
+
+    def close_later(self, context: BrowserContext):
+        """Close a context in the background"""
+        task = asyncio.create_task(self._close(context))
+        self._releases.add(task)
+        task.add_done_callback(self._releases.discard)
+
+    async def _close(self, context: BrowserContext):
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"Error closing browser context: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "browsers": len(self.browsers),
+            "headless": self.headless,
+            "maxFills": self.max_fills,
+            "activeContexts": sum(len(b.contexts) for b in self.browsers if b.is_connected()),
+            "pendingReleases": len(self._releases),
+            "fills": self.fills,
+        }
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import CACHE_MEMORY_MAX_BYTES, CACHE_DISK_PATH, CACHE_DISK_MAX_BYTES
+
+
+class ExtractionCache:
+    """Content-addressed cache: in-memory LRU in front of an optional SQLite tier.
+
+    Values are JSON-serialisable dicts; sizes are measured on their JSON encoding.
+    """
+
+    def __init__(self, memory_max_bytes: int = CACHE_MEMORY_MAX_BYTES,
+                 disk_path: Optional[str] = CACHE_DISK_PATH,
+                 disk_max_bytes: int = CACHE_DISK_MAX_BYTES):
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "stores": 0, "memory_evictions": 0, "disk_evictions": 0,
+        }
+
+        self._db = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            raw = self._memory.get(key)
+            if raw is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return json.loads(raw)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row[0])
+                    self.counters["disk_hits"] += 1
+                    return json.loads(row[0])
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Dict):
+        raw = json.dumps(value)
+        with self._lock:
+            self._remember(key, raw)
+            self.counters["stores"] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, raw, len(raw), time.time()),
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            disk_entries, disk_bytes = 0, 0
+            if self._db is not None:
+                disk_entries, disk_bytes = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+            return dict(
+                self.counters,
+                hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_bytes,
+                disk_entries=disk_entries,
+                disk_bytes=disk_bytes,
+            )
+
+    def _remember(self, key: str, raw: str):
+        """Insert into the memory tier and evict least-recently-used entries"""
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        if len(raw) > self.memory_max_bytes:
+            return
+        self._memory[key] = raw
+        self._memory_bytes += len(raw)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.counters["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            if total <= self.disk_max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.counters["disk_evictions"] += 1
+
+
+extraction_cache = ExtractionCache()
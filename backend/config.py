@@ -5,31 +5,104 @@ UPLOAD_DIR = "uploads"
 OUTPUT_DIR = "outputs"  # Keep this for PDF generation only
 SAMPLE_FORMS_DIR = "sample-forms"
 
+# Upload limits; files are streamed to disk in chunks of UPLOAD_CHUNK_SIZE
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_DOCUMENT_BYTES = 20 * 1024 * 1024
+MAX_FORM_BYTES = 10 * 1024 * 1024
+MAX_UPLOAD_REQUEST_BYTES = 100 * 1024 * 1024
+
+# OCR cascade: stop once these fields reach the confidence threshold
+OCR_CASCADE_REQUIRED_FIELDS = ["name", "idNumber", "dateOfBirth"]
+OCR_CASCADE_MIN_CONFIDENCE = 0.9
+OCR_CASCADE_EXHAUSTIVE = True  # Fall back to the full variant x mode sweep
+
+# OCR engine: "auto" uses resident tesserocr engines when installed, else pytesseract
+OCR_BACKEND = os.environ.get("OCR_BACKEND", "auto")
+OCR_LANG = "eng"
+
+# OCR worker pool: global cap on tesseract processes, and each request's share of it
+# (shared by all of a request's documents and pages; a job or batch run counts as one request)
+OCR_MAX_WORKERS = int(os.environ.get("OCR_MAX_WORKERS", os.cpu_count() or 4))
+OCR_REQUEST_CONCURRENCY = int(os.environ.get("OCR_REQUEST_CONCURRENCY", 4))
+
+# Region of interest: crop to the card (and its text block) before preprocessing
+OCR_ROI_ENABLED = True
+OCR_ROI_TEXT_CROP = True
+OCR_ROI_MIN_AREA = 0.2  # Smallest card, as a fraction of the photo
+OCR_ROI_CARD_ASPECT = 1.586  # ID-1 cards are 85.6 x 54 mm; other boxes (pages, forms) are not cropped to
+OCR_ROI_CARD_ASPECT_TOLERANCE = 0.12  # Allows for perspective; an A4 page (1.414) stays outside
+
+# OCR output dedup: texts at or above this shingle Jaccard similarity count as duplicates
+OCR_DEDUP_SIMILARITY = 0.9
+OCR_DEDUP_SHINGLE_SIZE = 4  # Characters per shingle
+
+# Scanned PDFs: pages with fewer text-layer characters than this are rasterized and OCR'd
+PDF_TEXT_MIN_CHARS = 25
+PDF_OCR_DPI = 300
+PDF_PAGE_WORKERS = int(os.environ.get("PDF_PAGE_WORKERS", 2))  # Pages rasterized/OCR'd at once
+
+# PDF text layer: "auto" uses PyMuPDF when installed, else PyPDF2
+PDF_TEXT_BACKEND = os.environ.get("PDF_TEXT_BACKEND", "auto")
+PDF_TEXT_PROCESSES = int(os.environ.get("PDF_TEXT_PROCESSES", min(4, os.cpu_count() or 1)))
+PDF_TEXT_BATCH_PAGES = 16  # Pages read between early-stop checks
+PDF_PARALLEL_MIN_PAGES = 8  # Smaller PDFs are read in-process
+
+# Documents extracted concurrently (each one drives its own OCR jobs)
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", 4))
+
+# Background extraction jobs (asyncMode uploads)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 100))
+JOB_RESULT_TTL = 3600  # Seconds a finished job stays queryable
+
+# Batch extraction (/api/batch and `python batch.py`): applicants processed at once
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 4))
+MAX_BATCH_BYTES = 2 * 1024 * 1024 * 1024  # Uploaded manifest zip
+BATCH_UPLOAD_DIR = f"{UPLOAD_DIR}/batch-uploads"  # Uploaded manifest zips, swept like other uploads
+BATCH_MANIFEST_DIR = os.environ.get("BATCH_MANIFEST_DIR", f"{UPLOAD_DIR}/batches")  # manifestPath must be inside
+BATCH_OUTPUT_DIR = f"{OUTPUT_DIR}/batches"  # batch-<key>.jsonl results, which are also the resume checkpoints
+
+# Warm Playwright browsers for /api/fill-url; each fill gets its own context
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 2))
+BROWSER_MAX_FILLS = int(os.environ.get("BROWSER_MAX_FILLS", 8))  # Concurrent fills across the pool
+BROWSER_HEADLESS = os.environ.get("BROWSER_HEADLESS", "1") != "0"
+
+# Filled-form review sessions: screenshot + storage state kept for REVIEW_TTL seconds.
+# Headful browsers also keep the live page open that long for a human to finish.
+REVIEW_DIR = f"{OUTPUT_DIR}/reviews"
+REVIEW_TTL = int(os.environ.get("REVIEW_TTL", 900))
+REVIEW_KEEP_LIVE = not BROWSER_HEADLESS
+REVIEW_MAX_LIVE = 4  # Oldest live page is closed beyond this (its snapshot stays)
+
+# Form field -> ExtractedData key matching (field_matcher.py)
+FIELD_MATCH_MIN_SCORE = 0.5
+FIELD_MATCH_CACHE_SIZE = 256  # Form layouts remembered
+FORM_TEMPLATE_CACHE_SIZE = 64  # Analysed PDF form templates, by content hash
+TEMPLATE_REGISTRY_PATH = f"{UPLOAD_DIR}/form-templates.sqlite3"  # Form analyses by field-tree fingerprint; None: memory only
+MERGE_WORKERS = int(os.environ.get("MERGE_WORKERS", min(4, os.cpu_count() or 1)))  # Bulk fill processes
+
+# Extraction cache keyed by content hash; set CACHE_DISK_PATH to None to keep it in memory only
+CACHE_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DISK_PATH = f"{UPLOAD_DIR}/extraction-cache.sqlite3"
+CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+# Retention: directory -> (max age in seconds, max total bytes); swept every RETENTION_SWEEP_INTERVAL.
+# Only direct files are managed. BATCH_MANIFEST_DIR holds operator-supplied manifests and is never swept;
+# a batch keeps its zip open while it runs, so an uploaded manifest can be swept mid-run.
+RETENTION_SWEEP_INTERVAL = 60
+RETENTION_RULES = {
+    OUTPUT_DIR: (3600, 1024 * 1024 * 1024),
+    BATCH_OUTPUT_DIR: (7 * 24 * 3600, 4 * 1024 * 1024 * 1024),  # Age counts from the last run
+    f"{UPLOAD_DIR}/documents": (24 * 3600, 2 * 1024 * 1024 * 1024),
+    f"{UPLOAD_DIR}/forms": (7 * 24 * 3600, 512 * 1024 * 1024),
+    BATCH_UPLOAD_DIR: (24 * 3600, 4 * 1024 * 1024 * 1024),
+}
+
 # Only create directories that are actually needed
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(f"{UPLOAD_DIR}/documents", exist_ok=True)
 os.makedirs(f"{UPLOAD_DIR}/forms", exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)  # For PDF outputs only
+os.makedirs(BATCH_OUTPUT_DIR, exist_ok=True)
+os.makedirs(BATCH_UPLOAD_DIR, exist_ok=True)
 os.makedirs(SAMPLE_FORMS_DIR, exist_ok=True)
-
-# You can manually delete outputs folder contents anytime
-# Or add this function to clean it automatically:
-
-def clean_outputs():
-    """Clean old output files"""
-    import glob
-    import time
-    
-    # Delete files older than 1 hour
-    cutoff_time = time.time() - 3600
-    
-    for filepath in glob.glob(os.path.join(OUTPUT_DIR, "*")):
-        if os.path.isfile(filepath):
-            if os.path.getmtime(filepath) < cutoff_time:
-                try:
-                    os.remove(filepath)
-                    print(f"🗑️ Deleted old file: {filepath}")
-                except:
-                    pass
-
-# Call this in main.py startup if you want auto-cleanup
\ No newline at end of file
@@ -1,12 +1,23 @@
-import re
-import pytesseract
+import os
 from PIL import Image, ImageEnhance, ImageFilter
-from PyPDF2 import PdfReader
 from models import ExtractedData
-import cv2
+from typing import Callable, List, Tuple, Optional, Dict, Union
 import numpy as np
-from typing import List, Tuple, Optional, Dict
 from dataclasses import dataclass
+from config import (OCR_CASCADE_REQUIRED_FIELDS, OCR_CASCADE_MIN_CONFIDENCE, OCR_CASCADE_EXHAUSTIVE,
+                    OCR_ROI_ENABLED, OCR_ROI_TEXT_CROP, OCR_ROI_CARD_ASPECT, OCR_ROI_CARD_ASPECT_TOLERANCE,
+                    PDF_TEXT_MIN_CHARS, PDF_OCR_DPI)
+from workers import ocr_limiter, run_ocr_jobs, run_pdf_page_jobs
+from pdf_extract import read_pdf_pages, is_scanned, render_page, can_rasterize, get_pdf_text_backend
+from cache import extraction_cache
+from ocr_dedup import TextDeduplicator, dedup_stats
+from preprocessing import VariantPipeline
+from ocr_backends import get_ocr_backend
+import patterns
+import hashlib
+import json
+import threading
+import time
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +32,114 @@ class ExtractionConfidence:
     pincode: float = 0.0
     document_type: str = "unknown"
 
+# Bump whenever extraction logic changes so cached results are not reused
+EXTRACTOR_VERSION = "2.5"
+
+# OCR cascade: (stage name, variant names, OEM modes, PSM modes), cheapest first.
+# A variant list of None means "every variant" - the old brute-force sweep,
+# restricted to combinations earlier stages have not already tried.
+OCR_CASCADE_STAGES = [
+    ("fast", ["original", "otsu"], [3], [6, 3]),
+    ("contrast", ["upscaled", "contrast_2.0", "clahe_2.0", "clahe_2.0_otsu"], [3], [6, 4]),
+    ("threshold", ["thresh_127", "thresh_150", "adaptive_21", "adaptive_31", "sharpened", "blur_otsu"], [3], [6, 11]),
+    ("heavy", ["denoised", "denoised_otsu", "bilateral", "contrast_1.5", "contrast_2.5",
+               "clahe_3.0", "clahe_3.0_otsu"], [1, 3], [3, 4, 6]),
+    ("exhaustive", None, [1, 2, 3], [3, 4, 6, 11, 12]),
+]
+
+class OCRCascadeStats:
+    """Per-stage timing and hit-rate counters, used to tune the cascade order"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.ocr_calls = 0
+        self.stages: Dict[str, Dict[str, float]] = {}
+    
+    def record_stage(self, stage: str, calls: int, texts: int, seconds: float, satisfied: bool):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {
+                'runs': 0, 'ocr_calls': 0, 'texts_kept': 0, 'seconds': 0.0, 'early_exits': 0
+            })
+            entry['runs'] += 1
+            entry['ocr_calls'] += calls
+            entry['texts_kept'] += texts
+            entry['seconds'] += seconds
+            if satisfied:
+                entry['early_exits'] += 1
+    
+    def record_document(self, calls: int):
+        with self._lock:
+            self.documents += 1
+            self.ocr_calls += calls
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stages = {}
+            for stage, entry in self.stages.items():
+                runs = entry['runs'] or 1
+                stages[stage] = dict(entry,
+                                     avg_seconds=round(entry['seconds'] / runs, 4),
+                                     hit_rate=round(entry['early_exits'] / runs, 4))
+            return {
+                'documents': self.documents,
+                'ocr_calls': self.ocr_calls,
+                'avg_calls_per_document': round(self.ocr_calls / self.documents, 2) if self.documents else 0.0,
+                'stages': stages,
+            }
+
+cascade_stats = OCRCascadeStats()
+
+class FieldVoter:
+    """Weighted vote over per-variant extractions.
+    
+    Each OCR variant casts one vote per field it found, weighted by the
+    extractor's confidence for that field. The winner per field is the value
+    with the most weight; agreement is its share of all weight for the field.
+    """
+    
+    def __init__(self):
+        self.texts = 0
+        self.votes: Dict[str, Dict[str, float]] = {}
+        self.best_confidence: Dict[str, Dict[str, float]] = {}
+    
+    def add(self, data: ExtractedData, confidence: Dict[str, float]):
+        self.texts += 1
+        for field, value in data.dict().items():
+            value = ' '.join(str(value).split())
+            if not value:
+                continue
+            weight = confidence.get(field, 1.0)
+            field_votes = self.votes.setdefault(field, {})
+            field_votes[value] = field_votes.get(value, 0.0) + weight
+            field_best = self.best_confidence.setdefault(field, {})
+            field_best[value] = max(field_best.get(value, 0.0), weight)
+    
+    def winners(self) -> Dict[str, Tuple[str, float]]:
+        """Winning value and agreement per field"""
+        result = {}
+        for field, field_votes in self.votes.items():
+            value, weight = max(field_votes.items(), key=lambda x: x[1])
+            result[field] = (value, round(weight / sum(field_votes.values()), 4))
+        return result
+    
+    def scores(self) -> Dict[str, float]:
+        """Best single-text confidence of each field's current winner"""
+        return {field: self.best_confidence[field][value] for field, (value, _) in self.winners().items()}
+    
+    def result(self) -> Tuple[ExtractedData, Dict[str, float]]:
+        winners = self.winners()
+        data = ExtractedData(**{field: value for field, (value, _) in winners.items()})
+        return data, {field: agreement for field, (_, agreement) in winners.items()}
+
+@dataclass
+class OCRCascadeResult:
+    """Outcome of one OCR cascade run"""
+    texts: List[str]
+    data: Optional[ExtractedData]
+    agreement: Dict[str, float]
+    ocr_calls: int
+
 class UniversalIDExtractor:
     """Universal Indian Government ID Extractor - Works for ALL document types"""
     
@@ -32,54 +151,18 @@ class UniversalIDExtractor:
             'transport', 'license', 'driving', 'vehicle', 'issued', 'valid'
         }
         
-        # Document type patterns for intelligent extraction
-        self.doc_patterns = {
-            'aadhaar': [
-                r'(?i)aadhaar',
-                r'(?i)unique\s+identification',
-                r'(?i)UIDAI',
-                r'\d{4}\s?\d{4}\s?\d{4}',
-                r'\d{4}/\d{5}/\d{5}'
-            ],
-            'pan': [
-                r'(?i)permanent\s+account',
-                r'(?i)income\s+tax',
-                r'(?i)PAN',
-                r'\b[A-Z]{5}\d{4}[A-Z]\b'
-            ],
-            'driving_license': [
-                r'(?i)driving\s+licence',
-                r'(?i)motor\s+vehicle',
-                r'(?i)transport',
-                r'(?i)authorization\s+to\s+drive',
-                r'DL\s*(?:No|Number)',
-                r'\b[A-Z]{2}\d{2}\s?\d{11}\b'
-            ],
-            'voter_id': [
-                r'(?i)election\s+commission',
-                r'(?i)voter',
-                r'(?i)EPIC',
-                r'Elector\s*(?:\'s)?\s*Photo',
-                r'\b[A-Z]{3}\d{7}\b'
-            ],
-            'passport': [
-                r'(?i)passport',
-                r'(?i)republic\s+of\s+india',
-                r'(?i)ministry\s+of\s+external',
-                r'\b[A-Z]\d{7}\b'
-            ]
-        }
+        # Shared, precompiled pattern registry
+        self.doc_patterns = patterns.DOC_PATTERNS
 
     def detect_document_type(self, text: str) -> str:
         """Intelligently detect document type"""
         text_upper = text.upper()
         
         scores = {}
-        for doc_type, patterns in self.doc_patterns.items():
+        for doc_type, doc_patterns in self.doc_patterns.items():
             score = 0
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                score += len(matches)
+            for pattern in doc_patterns:
+                score += len(pattern.findall(text))
             scores[doc_type] = score
         
         if scores:
@@ -93,135 +176,155 @@ class UniversalIDExtractor:
 
     def preprocess_image_ultimate(self, image_path: str) -> List[Image.Image]:
         """Ultimate preprocessing - optimized for ALL Indian ID documents"""
+        pipeline = VariantPipeline.from_path(image_path)
+        if pipeline is None:
+            return []
+        results = [Image.fromarray(array) for _, array in pipeline.iter()]
+        logger.info(f"✨ Generated {len(results)} preprocessed versions")
+        return results
+
+    def cascade_satisfied(self, scores: Dict[str, float]) -> bool:
+        """True once every required field reaches the configured confidence"""
+        return all(scores.get(field, 0.0) >= OCR_CASCADE_MIN_CONFIDENCE
+                   for field in OCR_CASCADE_REQUIRED_FIELDS)
+
+    def ocr_image(self, image, oem: int, psm: int, failures: Optional[List[Exception]] = None) -> str:
+        """Single tesseract call; errors count as an empty result and are appended to failures"""
         try:
-            img = cv2.imread(image_path)
-            if img is None:
-                return [Image.open(image_path)]
-            
-            results = []
-            
-            # Original
-            results.append(Image.open(image_path))
-            
-            # High resolution if small
-            h, w = img.shape[:2]
-            if w < 1000 or h < 1000:
-                scale = 2.0
-                img_large = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
-                results.append(Image.fromarray(cv2.cvtColor(img_large, cv2.COLOR_BGR2RGB)))
-            
-            # RGB enhancement
-            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            results.append(Image.fromarray(rgb))
-            
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Super high contrast
-            for alpha in [1.5, 2.0, 2.5]:
-                enhanced = cv2.convertScaleAbs(gray, alpha=alpha, beta=0)
-                results.append(Image.fromarray(enhanced))
-            
-            # Otsu thresholding
-            _, thresh_otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            results.append(Image.fromarray(thresh_otsu))
-            
-            # Multiple binary thresholds
-            for thresh_val in [100, 127, 150, 180]:
-                _, thresh = cv2.threshold(gray, thresh_val, 255, cv2.THRESH_BINARY)
-                results.append(Image.fromarray(thresh))
-            
-            # Inverted
-            _, thresh_inv = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
-            results.append(Image.fromarray(thresh_inv))
-            
-            # Adaptive thresholding
-            for block_size in [11, 15, 21, 31, 41]:
-                try:
-                    adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                                    cv2.THRESH_BINARY, block_size, 2)
-                    results.append(Image.fromarray(adaptive))
-                except:
-                    pass
+            return get_ocr_backend().image_to_string(image, oem, psm)
+        except Exception as e:
+            if failures is not None:
+                failures.append(e)
+            return ""
+
+    def run_ocr_cascade(self, source: Union[str, np.ndarray], limiter: Optional[threading.Semaphore] = None,
+                        progress: Optional[Callable[[Dict], None]] = None,
+                        keep_text: bool = False, roi: bool = OCR_ROI_ENABLED) -> OCRCascadeResult:
+        """Staged OCR cascade - cheap variants first, stops once key fields are found.
+        
+        Identical and near-identical OCR outputs are collapsed first; fields are
+        extracted once per distinct text and combined by weighted voting, with
+        each duplicate re-casting its representative's vote. progress, if given,
+        is called after every stage. limiter is the request's share of the OCR
+        pool (see workers.ocr_limiter). roi crops to the ID card in a photo; pass
+        False for full pages.
+        """
+        limiter = limiter or ocr_limiter()
+        voter = FieldVoter()
+        dedup = TextDeduplicator()
+        failures: List[Exception] = []  # Failed OCR calls for this document; the first is logged
+        extractions = {}
+        redundant = 0
+        all_texts = []
+        tried = set()
+        
+        if isinstance(source, str):
+            pipeline = VariantPipeline.from_path(source, roi=roi)
+        else:
+            pipeline = VariantPipeline.from_array(source, roi=roi)
+        if pipeline is None:
+            return OCRCascadeResult(texts=[], data=None, agreement={}, ocr_calls=0)
+        variant_index = {name: idx for idx, name in enumerate(pipeline.names)}
+        
+        for stage_name, stage_variants, oem_modes, psm_modes in OCR_CASCADE_STAGES:
+            if stage_variants is None:
+                if not OCR_CASCADE_EXHAUSTIVE:
+                    continue
+                stage_variants = pipeline.names
             
-            # CLAHE enhancement
-            for clip in [2.0, 3.0, 4.0]:
-                clahe = cv2.createCLAHE(clipLimit=clip, tileGridSize=(8, 8))
-                clahe_img = clahe.apply(gray)
-                results.append(Image.fromarray(clahe_img))
-                
-                _, clahe_thresh = cv2.threshold(clahe_img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                results.append(Image.fromarray(clahe_thresh))
+            planned = {}
+            for name in stage_variants:
+                if name not in variant_index:
+                    continue
+                modes = [(oem, psm) for oem in oem_modes for psm in psm_modes if (name, oem, psm) not in tried]
+                if modes:
+                    planned[name] = modes
+            if not planned:
+                continue
             
-            # Denoising
-            denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-            results.append(Image.fromarray(denoised))
-            _, denoised_thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            results.append(Image.fromarray(denoised_thresh))
+            attempts = sum(len(modes) for modes in planned.values())
+            logger.info(f"🔍 OCR stage '{stage_name}': {attempts} attempts")
+            start = time.perf_counter()
+            tried.update((name, oem, psm) for name, modes in planned.items() for oem, psm in modes)
             
-            # Bilateral filter
-            bilateral = cv2.bilateralFilter(gray, 9, 75, 75)
-            results.append(Image.fromarray(bilateral))
+            # Each variant is built only when a slot frees up and dropped once its calls finish,
+            # so only as many variants as limiter has slots (plus the shared intermediates) are alive
+            jobs = []
             
-            # Morphological operations
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-            morph_close = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
-            results.append(Image.fromarray(morph_close))
+            def calls():
+                for name, image in pipeline.iter(planned):
+                    for oem, psm in planned[name]:
+                        jobs.append((name, oem, psm))
+                        yield image, oem, psm, failures
             
-            # Erosion and dilation
-            eroded = cv2.erode(gray, kernel, iterations=1)
-            results.append(Image.fromarray(eroded))
+            reported = len(failures)
+            texts = run_ocr_jobs(self.ocr_image, calls(), limiter)
+            if failures and not reported:
+                # A broken OCR install otherwise looks like a document with no text
+                logger.error(f"❌ OCR call failed: {failures[0]!r}", exc_info=failures[0])
             
-            dilated = cv2.dilate(gray, kernel, iterations=1)
-            results.append(Image.fromarray(dilated))
+            # Collapse duplicates in job order so the outcome stays deterministic
+            placements = []
+            fresh = []
+            for (name, oem, psm), text in zip(jobs, texts):
+                if not text or len(text.strip()) <= 10:
+                    continue
+                index, kind = dedup.add(text)
+                dedup_stats.record(name, kind)
+                placements.append(index)
+                if kind == 'unique':
+                    fresh.append(index)
+                    if keep_text:
+                        all_texts.append(f"[V{variant_index[name]}_OEM{oem}_PSM{psm}]\n{text}\n")
+                else:
+                    redundant += 1
             
-            # Sharpening
-            kernel_sharp = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-            sharpened = cv2.filter2D(gray, -1, kernel_sharp)
-            results.append(Image.fromarray(sharpened))
+            # Only distinct texts go through the field extractors
+            fields = run_ocr_jobs(self.extract_fields, [(dedup.texts[i],) for i in fresh], limiter)
+            for index, (data, confidence, _) in zip(fresh, fields):
+                extractions[index] = (data, confidence)
+            for index in placements:
+                voter.add(*extractions[index])
+            kept = len(placements)
             
-            # Gaussian blur + threshold
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            _, blur_thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            results.append(Image.fromarray(blur_thresh))
+            scores = voter.scores()
+            satisfied = self.cascade_satisfied(scores)
+            elapsed = time.perf_counter() - start
+            cascade_stats.record_stage(stage_name, len(jobs), kept, elapsed, satisfied)
+            logger.info(f"   Stage '{stage_name}' took {elapsed:.2f}s, kept {kept} texts, scores: {scores}")
             
-            logger.info(f"✨ Generated {len(results)} preprocessed versions")
-            return results
+            if progress:
+                progress({
+                    'stage': stage_name,
+                    'variants_ocred': len({name for name, _, _ in tried}),
+                    'ocr_calls': len(tried),
+                    'fields_found': [f for f, score in scores.items() if score >= OCR_CASCADE_MIN_CONFIDENCE],
+                    'redundant_texts': redundant,
+                })
             
-        except Exception as e:
-            logger.error(f"❌ Preprocessing error: {str(e)}")
-            try:
-                return [Image.open(image_path)]
-            except:
-                return []
-
-    def extract_text_maximum_coverage(self, file_path: str) -> str:
-        """Maximum OCR coverage - tries EVERYTHING"""
+            if satisfied:
+                logger.info(f"🛑 Required fields found after stage '{stage_name}' - stopping early")
+                break
+        
+        pipeline.release()
+        cascade_stats.record_document(len(tried))
+        data, agreement = voter.result()
+        logger.info(f"✅ Voted over {voter.texts} text versions from {len(tried)} OCR attempts "
+                    f"({len(dedup.texts)} distinct, {redundant} redundant, {len(failures)} failed)")
+        logger.info(f"   Field agreement: {agreement}")
+        
+        if progress:
+            progress({'stage': 'vote', 'agreement': agreement})
+        
+        return OCRCascadeResult(texts=all_texts, data=data if voter.texts else None,
+                                agreement=agreement, ocr_calls=len(tried))
+
+    def extract_text_maximum_coverage(self, file_path: str, limiter: Optional[threading.Semaphore] = None,
+                                      progress: Optional[Callable[[Dict], None]] = None) -> str:
+        """OCR text of every kept variant, joined with ===SPLIT==="""
         try:
-            all_texts = []
-            processed_images = self.preprocess_image_ultimate(file_path)
-            
-            psm_modes = [3, 4, 6, 11, 12]
-            oem_modes = [1, 2, 3]
-            
-            logger.info(f"🔍 Running OCR: {len(processed_images)} images × {len(psm_modes)} PSM × {len(oem_modes)} OEM = {len(processed_images) * len(psm_modes) * len(oem_modes)} attempts")
-            
-            attempt = 0
-            for img_idx, img in enumerate(processed_images):
-                for oem in oem_modes:
-                    for psm in psm_modes:
-                        try:
-                            config = f'--oem {oem} --psm {psm}'
-                            text = pytesseract.image_to_string(img, config=config, lang='eng')
-                            if text and len(text.strip()) > 10:
-                                all_texts.append(f"[V{img_idx}_OEM{oem}_PSM{psm}]\n{text}\n")
-                                attempt += 1
-                        except:
-                            continue
-            
-            logger.info(f"✅ Successfully extracted {attempt} text versions")
-            combined = "\n===SPLIT===\n".join(all_texts)
-            return combined
-            
+            result = self.run_ocr_cascade(file_path, limiter, progress, keep_text=True)
+            return "\n===SPLIT===\n".join(result.texts)
         except Exception as e:
             logger.error(f"❌ OCR error: {str(e)}")
             return ""
@@ -248,42 +351,13 @@ class UniversalIDExtractor:
         
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
-        # Document-specific patterns
-        if doc_type == 'pan':
-            patterns = [
-                (r'(?:Name|NAME)\s*[:\n]\s*([A-Z][A-Za-z\s]{3,50}?)(?=\n|Date of Birth|Father)', 0.98),
-                (r'(?:Name|NAME)\s+([A-Z][A-Z\s]{3,50}?)(?=\n|\s{2,})', 0.95),
-            ]
-        elif doc_type == 'driving_license':
-            patterns = [
-                (r'(?:Name|NAME|Holder)[:\s]+([A-Z][A-Za-z\s]{3,50}?)(?=\n|S/O|D/O|DOB|Address)', 0.98),
-                (r'(?:Name|NAME)\s*[:\n]\s*([A-Z][A-Za-z\s]{3,50}?)(?=\n)', 0.95),
-            ]
-        elif doc_type == 'aadhaar':
-            patterns = [
-                (r'To[\s\n:]+([A-Z][a-z]{2,15}(?:\s+[A-Z](?:\s+[A-Z])?)?(?:\s+[A-Z][a-z]{2,15})?)', 0.98),
-                (r'\b([A-Z][a-z]{3,15}\s+[A-Z]\s+[A-Z])\b', 0.95),
-            ]
-        else:
-            patterns = [
-                (r'(?:Name|NAME|To|TO)[:\s\n]+([A-Z][A-Za-z\s]{3,50}?)(?=\n|S/O|D/O|Father|Mother|DOB|Address|\d)', 0.95),
-            ]
-        
-        # Add universal patterns
-        patterns.extend([
-            (r'(?:To|Name|NAME)[:\s]+([A-Z][A-Za-z\s]{3,50}?)(?=\n|$|[,.]|\s+(?:S/O|D/O|Father))', 0.92),
-            (r'\b([A-Z][a-z]{2,15}(?:\s+[A-Z][a-z]{2,15}){1,3})\b', 0.80),
-            (r'\b([A-Z][a-z]{3,15}\s+[A-Z](?:\s+[A-Z])?)\b', 0.85),
-            (r'\b([A-Z]{3,15}(?:\s+[A-Z]{3,15}){1,3})\b', 0.75),
-            (r'(?:Card|CARD|License|LICENSE)[\s\n]{1,20}([A-Z][A-Za-z\s]{5,50}?)(?=\n|Father|Address|S/O|D/O)', 0.85),
-        ])
-        
-        # Try all patterns
-        for pattern, confidence in patterns:
-            matches = re.finditer(pattern, text, re.MULTILINE)
-            for match in matches:
+        # Document-specific patterns first, then universal ones
+        name_patterns = patterns.NAME_PATTERNS.get(doc_type, patterns.NAME_PATTERNS['default'])
+        
+        for pattern, confidence in name_patterns + patterns.NAME_PATTERNS_UNIVERSAL:
+            for match in pattern.finditer(text):
                 name = match.group(1).strip()
-                name = re.sub(r'\s+', ' ', name)
+                name = patterns.WHITESPACE.sub(' ', name)
                 
                 if self.is_valid_name(name):
                     found_names[name] = found_names.get(name, 0) + confidence
@@ -293,7 +367,7 @@ class UniversalIDExtractor:
             if any(kw in line.upper() for kw in ['GOVERNMENT', 'INDIA', 'INCOME TAX', 'DEPARTMENT', 'MINISTRY']):
                 continue
             
-            if re.match(r'^[A-Z][A-Za-z\s]{5,60}$', line):
+            if patterns.NAME_LINE.match(line):
                 if not any(char.isdigit() for char in line):
                     if self.is_valid_name(line):
                         found_names[line] = found_names.get(line, 0) + 0.70
@@ -314,14 +388,14 @@ class UniversalIDExtractor:
         if not name or len(name) < 3 or len(name) > 70:
             return False
         
-        name = re.sub(r'\s+', ' ', name).strip()
+        name = patterns.WHITESPACE.sub(' ', name).strip()
         parts = name.split()
         
         if len(parts) < 1 or len(parts) > 5:
             return False
         
         for part in parts:
-            if not re.match(r'^[A-Za-z.]+$', part):
+            if not patterns.NAME_PART.match(part):
                 return False
         
         name_lower = name.lower()
@@ -343,33 +417,14 @@ class UniversalIDExtractor:
     def extract_address_universal(self, text: str, doc_type: str) -> Tuple[str, float]:
         """Universal address extraction for all documents"""
         
-        if doc_type == 'pan':
-            patterns = [
-                (r'(?:Address|ADDRESS)[:\s]+((?:.*?(?:\n.*?){1,5}?)?\d{6})', 0.95),
-                (r'(?:Flat|House|Plot|Door)[^\n]*(?:\n[^\n]+){1,4}\d{6}', 0.90),
-            ]
-        elif doc_type == 'driving_license':
-            patterns = [
-                (r'(?:Address|ADDRESS)[:\s]+((?:.*?(?:\n.*?){1,6}?)?\d{6})', 0.95),
-                (r'(?:House|Door|Flat|No)[^\n]*(?:\n[^\n]+){1,5}\d{6}', 0.90),
-            ]
-        else:
-            patterns = [
-                (r'((?:NO|No|D\.?No|H\.?No)[:\s]*\d+[/\-,]?\d*[^\n]*?(?:NAGAR|Nagar|POST|Post|Road|ROAD|Street|STREET|Patti|Village|Dist|District)[^\n]*?\d{6})', 0.98),
-                (r'((?:NO|No|D\.?No)[:\s]*\d+[/\-]?\d*[^\n]*(?:\n[^\n]+){1,6}?\d{6})', 0.95),
-            ]
-        
-        patterns.extend([
-            (r'(?:Address|ADDRESS)[:\s]+(.*?\d{6})', 0.88),
-            (r'([^\n]*(?:Nagar|Post|Road|Street|District|Dist|Village|City)[^\n]*\d{6})', 0.80),
-        ])
-        
-        for pattern, confidence in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        address_patterns = patterns.ADDRESS_PATTERNS.get(doc_type, patterns.ADDRESS_PATTERNS['default'])
+        
+        for pattern, confidence in address_patterns + patterns.ADDRESS_PATTERNS_UNIVERSAL:
+            match = pattern.search(text)
             if match:
                 addr = match.group(1)
-                addr = re.sub(r'\s+', ' ', addr)
-                addr = re.sub(r'\n+', ', ', addr)
+                addr = patterns.WHITESPACE.sub(' ', addr)
+                addr = patterns.NEWLINES.sub(', ', addr)
                 addr = addr.strip()
                 
                 if len(addr) > 20 and not any(kw in addr.upper() for kw in ['GOVERNMENT', 'INCOME TAX']):
@@ -384,7 +439,7 @@ class UniversalIDExtractor:
         for line in lines:
             line = line.strip()
             
-            if re.search(r'(?:Address|ADDRESS|NO|No|D\.?No|House|Flat)', line, re.IGNORECASE):
+            if patterns.ADDRESS_LINE_START.search(line):
                 if not any(kw in line.upper() for kw in ['GOVERNMENT', 'DEPARTMENT', 'INCOME TAX']):
                     capturing = True
             
@@ -394,7 +449,7 @@ class UniversalIDExtractor:
                 
                 address_parts.append(line)
                 
-                if re.search(r'\d{6}', line):
+                if patterns.SIX_DIGITS.search(line):
                     break
                 
                 if len(address_parts) > 10:
@@ -402,7 +457,7 @@ class UniversalIDExtractor:
         
         if address_parts:
             full_addr = ' '.join(address_parts)
-            full_addr = re.sub(r'\s+', ' ', full_addr)
+            full_addr = patterns.WHITESPACE.sub(' ', full_addr)
             if len(full_addr) > 20:
                 logger.info(f"✅ ADDRESS ASSEMBLED: {full_addr[:60]}...")
                 return full_addr, 0.70
@@ -415,46 +470,32 @@ class UniversalIDExtractor:
         ids = {}
         
         # AADHAAR
-        aadhaar_patterns = [
-            r'\b(\d{4}\s?\d{4}\s?\d{4})\b',
-            r'(?:Aadhaar|AADHAAR|UID)[:\s]*(\d{4}\s?\d{4}\s?\d{4})',
-        ]
-        for pattern in aadhaar_patterns:
-            matches = re.findall(pattern, text)
+        for pattern in patterns.AADHAAR_PATTERNS:
+            matches = pattern.findall(text)
             for match in matches:
-                aadhaar = re.sub(r'[^\d]', '', match)
+                aadhaar = patterns.NON_DIGIT.sub('', match)
                 if len(aadhaar) == 12 and aadhaar.isdigit():
                     if not aadhaar.startswith(('6','7','8','9')):
                         ids['aadhaar'] = aadhaar
                         break
         
         # ENROLLMENT
-        enrol_pattern = r'(\d{4}[/]\d{5}[/]\d{5})'
-        match = re.search(enrol_pattern, text)
+        match = patterns.ENROLLMENT.search(text)
         if match:
             ids['enrollment'] = match.group(1)
         
         # PAN
-        pan_patterns = [
-            r'\b([A-Z]{5}\d{4}[A-Z])\b',
-            r'(?:PAN|Permanent Account)[^\n]*\n\s*([A-Z]{5}\d{4}[A-Z])',
-        ]
-        for pattern in pan_patterns:
-            match = re.search(pattern, text)
+        for pattern in patterns.PAN_PATTERNS:
+            match = pattern.search(text)
             if match:
                 pan = match.group(1)
-                if re.match(r'^[A-Z]{3}[ABCFGHLJPTF][A-Z]\d{4}[A-Z]$', pan):
+                if patterns.PAN_STRICT.match(pan):
                     ids['pan'] = pan
                     break
         
         # DRIVING LICENSE
-        dl_patterns = [
-            r'\b([A-Z]{2}[-\s]?\d{2}[-\s]?\d{11})\b',
-            r'\b([A-Z]{2}\d{13,14})\b',
-            r'(?:DL|License|Licence)\s*(?:No|Number|#)?[:\s]*([A-Z]{2}[-\s]?\d{13,15})',
-        ]
-        for pattern in dl_patterns:
-            match = re.search(pattern, text)
+        for pattern in patterns.DL_PATTERNS:
+            match = pattern.search(text)
             if match:
                 dl = match.group(1).replace(' ', '').replace('-', '')
                 if len(dl) >= 13 and dl[:2].isalpha():
@@ -462,12 +503,8 @@ class UniversalIDExtractor:
                     break
         
         # VOTER ID
-        voter_patterns = [
-            r'\b([A-Z]{3}\d{7})\b',
-            r'(?:EPIC|Elector|Voter)[^\n]*\n\s*([A-Z]{3}\d{7})',
-        ]
-        for pattern in voter_patterns:
-            match = re.search(pattern, text)
+        for pattern in patterns.VOTER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 voter_id = match.group(1)
                 if not any(word in voter_id for word in ['PAN', 'TAX']):
@@ -475,12 +512,8 @@ class UniversalIDExtractor:
                     break
         
         # PASSPORT
-        passport_patterns = [
-            r'\b([A-Z]\d{7})\b',
-            r'(?:Passport|Pass Port)[^\n]*\n\s*([A-Z]\d{7})',
-        ]
-        for pattern in passport_patterns:
-            match = re.search(pattern, text)
+        for pattern in patterns.PASSPORT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 ids['passport'] = match.group(1)
                 break
@@ -496,17 +529,11 @@ class UniversalIDExtractor:
 
     def extract_father_name(self, text: str) -> Tuple[str, float]:
         """Extract father's name"""
-        patterns = [
-            (r'(?:S/O|s/o|Son of|SON OF)[:\s]+([A-Z][A-Za-z\s]{3,40}?)(?=\n|,|Address|DOB|\d)', 0.95),
-            (r'(?:D/O|d/o|Daughter of|DAUGHTER OF)[:\s]+([A-Z][A-Za-z\s]{3,40}?)(?=\n|,|Address|DOB|\d)', 0.95),
-            (r'(?:Father|FATHER)[:\s\']+s?\s*(?:Name)?[:\s]*([A-Z][A-Za-z\s]{3,40}?)(?=\n|,|Mother)', 0.90),
-        ]
-        
-        for pattern, confidence in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, confidence in patterns.FATHER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 father = match.group(1).strip()
-                father = re.sub(r'\s+', ' ', father)
+                father = patterns.WHITESPACE.sub(' ', father)
                 if self.is_valid_name(father):
                     logger.info(f"✅ FATHER'S NAME: {father}")
                     return father, confidence
@@ -517,17 +544,10 @@ class UniversalIDExtractor:
         """Universal phone extraction"""
         phones = []
         
-        patterns = [
-            r'(?:Phone|Mobile|Mob|Contact|Tel|Cell)[:\s]*([6-9]\d{9})',
-            r'\+91[\s-]?([6-9]\d{9})',
-            r'\b([6-9]\d{9})\b',
-            r'(\d{5}[\s-]?\d{5})',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
+        for pattern in patterns.PHONE_PATTERNS:
+            matches = pattern.findall(text)
             for match in matches:
-                phone = re.sub(r'[^\d]', '', match)
+                phone = patterns.NON_DIGIT.sub('', match)
                 if len(phone) == 10 and phone[0] in '6789':
                     if len(set(phone)) > 3:
                         if phone not in phones:
@@ -539,12 +559,35 @@ class UniversalIDExtractor:
 
     def extract_complete_data(self, text: str) -> ExtractedData:
         """UNIVERSAL extraction - works for ALL Indian government IDs"""
-        data = ExtractedData()
-        
         logger.info("="*80)
         logger.info("🚀 STARTING UNIVERSAL ID EXTRACTION")
         logger.info("="*80)
         
+        data, _, doc_type = self.extract_fields(text)
+        
+        # Final Summary
+        logger.info("="*80)
+        logger.info("📋 EXTRACTION SUMMARY:")
+        logger.info(f"   Document Type: {doc_type.upper()}")
+        logger.info(f"   Name: {data.name or '❌ NOT FOUND'}")
+        logger.info(f"   Father: {data.fatherName or '❌ NOT FOUND'}")
+        logger.info(f"   DOB: {data.dateOfBirth or '❌ NOT FOUND'}")
+        logger.info(f"   Gender: {data.gender or '❌ NOT FOUND'}")
+        logger.info(f"   Address: {(data.address[:60] + '...') if data.address else '❌ NOT FOUND'}")
+        logger.info(f"   City: {data.city or '❌ NOT FOUND'}")
+        logger.info(f"   State: {data.state or '❌ NOT FOUND'}")
+        logger.info(f"   Pincode: {data.pincode or '❌ NOT FOUND'}")
+        logger.info(f"   Phone: {data.phone or '❌ NOT FOUND'}")
+        logger.info(f"   Email: {data.email or '❌ NOT FOUND'}")
+        logger.info(f"   ID Number: {data.idNumber or '❌ NOT FOUND'}")
+        logger.info("="*80)
+        
+        return data
+
+    def extract_fields(self, text: str) -> Tuple[ExtractedData, Dict[str, float], str]:
+        """Run every field extractor on one text; returns data, per-field confidence, doc type"""
+        data = ExtractedData()
+        
         # Detect document type
         doc_type = self.detect_document_type(text)
         
@@ -579,18 +622,14 @@ class UniversalIDExtractor:
             data.phone = phones[0]
         
         # Pincode
-        pincode_matches = re.findall(r'\b([1-9]\d{5})\b', text)
+        pincode_matches = patterns.PINCODE.findall(text)
         if pincode_matches:
             data.pincode = pincode_matches[0]
             logger.info(f"✅ PINCODE: {data.pincode}")
         
         # Date of Birth
-        dob_patterns = [
-            r'(?:DOB|Date of Birth|Birth|D\.O\.B)[:\s]*(\d{2}[/-]\d{2}[/-]\d{4})',
-            r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b',
-        ]
-        for pattern in dob_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in patterns.DOB_PATTERNS:
+            match = pattern.search(text)
             if match:
                 dob = match.group(1).replace('-', '/')
                 year = int(dob.split('/')[-1])
@@ -600,15 +639,15 @@ class UniversalIDExtractor:
                     break
         
         # Gender
-        if re.search(r'\b(Female|FEMALE|F)\b', text):
+        if patterns.GENDER_FEMALE.search(text):
             data.gender = 'Female'
             logger.info(f"✅ GENDER: Female")
-        elif re.search(r'\b(Male|MALE|M)\b', text):
+        elif patterns.GENDER_MALE.search(text):
             data.gender = 'Male'
             logger.info(f"✅ GENDER: Male")
         
         # Email
-        email_match = re.search(r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b', text)
+        email_match = patterns.EMAIL.search(text)
         if email_match:
             data.email = email_match.group(1)
             logger.info(f"✅ EMAIL: {data.email}")
@@ -628,8 +667,9 @@ class UniversalIDExtractor:
             'Kochi', 'Thiruvananthapuram', 'Kozhikode', 'Kannur'
         ]
         
+        text_lower = text.lower()
         for city in cities:
-            if city.lower() in text.lower():
+            if city.lower() in text_lower:
                 data.city = city
                 logger.info(f"✅ CITY: {city}")
                 break
@@ -644,54 +684,190 @@ class UniversalIDExtractor:
         ]
         
         for state in states:
-            if state.lower() in text.lower() or state.replace(' ', '').lower() in text.lower():
+            if state.lower() in text_lower or state.replace(' ', '').lower() in text_lower:
                 data.state = state
                 logger.info(f"✅ STATE: {state}")
                 break
         
-        # Final Summary
-        logger.info("="*80)
-        logger.info("📋 EXTRACTION SUMMARY:")
-        logger.info(f"   Document Type: {doc_type.upper()}")
-        logger.info(f"   Name: {data.name or '❌ NOT FOUND'}")
-        logger.info(f"   Father: {data.fatherName or '❌ NOT FOUND'}")
-        logger.info(f"   DOB: {data.dateOfBirth or '❌ NOT FOUND'}")
-        logger.info(f"   Gender: {data.gender or '❌ NOT FOUND'}")
-        logger.info(f"   Address: {(data.address[:60] + '...') if data.address else '❌ NOT FOUND'}")
-        logger.info(f"   City: {data.city or '❌ NOT FOUND'}")
-        logger.info(f"   State: {data.state or '❌ NOT FOUND'}")
-        logger.info(f"   Pincode: {data.pincode or '❌ NOT FOUND'}")
-        logger.info(f"   Phone: {data.phone or '❌ NOT FOUND'}")
-        logger.info(f"   Email: {data.email or '❌ NOT FOUND'}")
-        logger.info(f"   ID Number: {data.idNumber or '❌ NOT FOUND'}")
-        logger.info("="*80)
+        # Name confidence adds up over repeated matches; cap it so one noisy text can't dominate a vote
+        confidence = {field: 1.0 for field, value in data.dict().items() if value}
+        if data.name:
+            confidence['name'] = min(name_conf, 1.0)
+        if data.address:
+            confidence['address'] = addr_conf
+        if data.fatherName:
+            confidence['fatherName'] = father_conf
         
-        return data
+        return data, confidence, doc_type
+
+
+# The extractor holds no per-call state, so one instance is shared by all threads
+_extractor = UniversalIDExtractor()
+
+def get_extractor() -> UniversalIDExtractor:
+    """Shared extractor instance"""
+    return _extractor
 
 
 # Legacy functions for backward compatibility
+def ocr_pdf_page(file_path: str, index: int, progress: Optional[Callable[[Dict], None]] = None,
+                 keep_text: bool = False, limiter: Optional[threading.Semaphore] = None) -> Optional[OCRCascadeResult]:
+    """Rasterize one scanned page and run the OCR cascade on it"""
+    try:
+        image = render_page(file_path, index)
+        page_progress = (lambda update: progress(dict(update, page=index + 1))) if progress else None
+        # A rendered page is the whole document already: cropping to its largest box loses the rest
+        return get_extractor().run_ocr_cascade(image, limiter, page_progress, keep_text=keep_text, roi=False)
+    except Exception as e:
+        logger.error(f"❌ Page {index + 1} OCR error: {str(e)}")
+        return None
+
+
+def ocr_scanned_pages(file_path: str, page_texts: List[str], progress: Optional[Callable[[Dict], None]] = None,
+                      keep_text: bool = False,
+                      limiter: Optional[threading.Semaphore] = None) -> Dict[int, OCRCascadeResult]:
+    """OCR every page without a usable text layer, a few pages at a time, all sharing one limiter"""
+    limiter = limiter or ocr_limiter()
+    scanned = [i for i, text in enumerate(page_texts) if is_scanned(text)]
+    if not scanned:
+        return {}
+    if not can_rasterize():
+        logger.warning(f"⚠️  {len(scanned)} scanned page(s) skipped: install PyMuPDF to OCR them")
+        return {}
+    logger.info(f"🖨️  {len(scanned)}/{len(page_texts)} page(s) look scanned - rasterizing at {PDF_OCR_DPI} DPI")
+    results = run_pdf_page_jobs(ocr_pdf_page, [(file_path, i, progress, keep_text, limiter) for i in scanned])
+    return {i: result for i, result in zip(scanned, results) if result is not None}
+
+
 def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF"""
+    """Extract text from PDF, OCR'ing pages that have no text layer"""
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except:
+        page_texts = [page.text for page in read_pdf_pages(file_path)]
+        for index, result in ocr_scanned_pages(file_path, page_texts, keep_text=True).items():
+            page_texts[index] = "\n===SPLIT===\n".join(result.texts)
+        return "\n".join(page_texts)
+    except Exception as e:
+        logger.error(f"❌ PDF error: {str(e)}")
         return ""
 
 
-def extract_text_from_image(file_path: str) -> str:
+def extract_data_from_pdf(file_path: str, progress: Optional[Callable[[Dict], None]] = None,
+                          limiter: Optional[threading.Semaphore] = None) -> Optional[ExtractedData]:
+    """Text-layer pages go through the regex pass; scanned pages through the OCR vote"""
+    extractor = get_extractor()
+    # Each batch of text-layer pages is extracted once and votes here; the vote is the text-layer result
+    voter = FieldVoter()
+    voted = 0
+    
+    def vote(batch):
+        batch_text = "\n".join(page.text for page in batch if not is_scanned(page.text))
+        if batch_text:
+            logger.info(f"Extracted text layer: {len(batch_text)} characters")
+            data, confidence, _ = extractor.extract_fields(batch_text)
+            voter.add(data, confidence)
+    
+    def required_fields_found(batch) -> bool:
+        nonlocal voted
+        vote(batch)
+        voted += len(batch)
+        return extractor.cascade_satisfied(voter.scores())
+    
+    try:
+        pages = read_pdf_pages(file_path, stop=required_fields_found)
+    except Exception as e:
+        logger.error(f"❌ PDF error: {str(e)}")
+        return None
+    vote(pages[voted:])  # The last batch (or a short PDF's only one) never reaches the stop check
+    page_texts = [page.text for page in pages]
+    
+    extracted = []
+    if voter.texts:
+        extracted.append(voter.result()[0])
+    
+    for result in ocr_scanned_pages(file_path, page_texts, progress, limiter=limiter).values():
+        if result.data is not None:
+            extracted.append(result.data)
+    
+    return merge_data(extracted) if extracted else None
+
+
+def extract_text_from_image(file_path: str, progress: Optional[Callable[[Dict], None]] = None) -> str:
     """Extract text from image using universal extractor"""
-    extractor = UniversalIDExtractor()
-    return extractor.extract_text_maximum_coverage(file_path)
+    return get_extractor().extract_text_maximum_coverage(file_path, progress=progress)
+
+
+def extract_data_from_image(file_path: str, progress: Optional[Callable[[Dict], None]] = None,
+                            limiter: Optional[threading.Semaphore] = None) -> Optional[ExtractedData]:
+    """OCR an image and vote on its fields across preprocessing variants"""
+    try:
+        return get_extractor().run_ocr_cascade(file_path, limiter, progress).data
+    except Exception as e:
+        logger.error(f"❌ OCR error: {str(e)}")
+        return None
 
 
 def extract_data_from_text(text: str) -> ExtractedData:
     """Extract data using universal extractor"""
-    extractor = UniversalIDExtractor()
-    return extractor.extract_complete_data(text)
+    return get_extractor().extract_complete_data(text)
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extraction_cache_key(content_hash: str) -> str:
+    """Cache key: document content + extractor version + OCR configuration"""
+    config = json.dumps({
+        'version': EXTRACTOR_VERSION,
+        'stages': OCR_CASCADE_STAGES,
+        'required': OCR_CASCADE_REQUIRED_FIELDS,
+        'min_confidence': OCR_CASCADE_MIN_CONFIDENCE,
+        'exhaustive': OCR_CASCADE_EXHAUSTIVE,
+        'roi': [OCR_ROI_ENABLED, OCR_ROI_TEXT_CROP, OCR_ROI_CARD_ASPECT, OCR_ROI_CARD_ASPECT_TOLERANCE],
+        'backend': get_ocr_backend().name,
+        'pdf': [PDF_TEXT_MIN_CHARS, PDF_OCR_DPI, get_pdf_text_backend().name],
+    }, sort_keys=True)
+    return hashlib.sha256(f"{content_hash}:{config}".encode()).hexdigest()
+
+
+def extract_document(file_path: str, progress: Optional[Callable[[Dict], None]] = None,
+                     content_hash: Optional[str] = None,
+                     limiter: Optional[threading.Semaphore] = None) -> Optional[ExtractedData]:
+    """Extract structured data from one saved document (blocking).
+
+    Pass the request's OCR limiter (workers.ocr_limiter) when it extracts
+    several documents, so they share one slice of the OCR pool.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    cache_key = extraction_cache_key(content_hash or file_sha256(file_path))
+    
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"⚡ Cache hit for {file_path}")
+        return ExtractedData(**cached['data'])
+    
+    if ext == '.pdf':
+        logger.info(f"Extracting from PDF: {file_path}")
+        data = extract_data_from_pdf(file_path, progress, limiter)
+    elif ext in ['.jpg', '.jpeg', '.png']:
+        logger.info(f"Extracting from image using OCR: {file_path}")
+        data = extract_data_from_image(file_path, progress, limiter)
+    else:
+        logger.warning(f"Unsupported file type: {ext}")
+        return None
+    
+    if data is None:
+        # Not cached: an empty result may be a transient OCR failure
+        logger.warning(f"No text extracted from document: {file_path}")
+        return None
+    
+    extraction_cache.put(cache_key, {'data': data.dict()})
+    return data
 
 
 def merge_data(data_list: list) -> ExtractedData:
@@ -0,0 +1,228 @@
+"""Maps form field labels to ExtractedData keys.
+
+Shared by the PDF and web fillers. Every synonym is normalized and indexed
+once at import (by token and by character trigram), so a label only ever
+meets the synonyms it shares a token or trigram with. A whole form layout is
+resolved in one pass: every field is scored against every key it could
+match, then fields and keys are paired greedily, best score first, so each
+field gets at most one key and each key at most one field. PDF forms that
+repeat a field on several pages ask for many fields per key instead.
+Layouts already seen are answered from an LRU cache.
+"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from config import FIELD_MATCH_MIN_SCORE, FIELD_MATCH_CACHE_SIZE
+
+SYNONYMS: Dict[str, List[str]] = {
+    'name': ['name', 'full name', 'your name', 'applicant', 'applicant name', 'candidate name',
+             'name of applicant', 'student name'],
+    'fatherName': ['father', 'father name', 'fathers name', 'parent name', 'guardian', 'guardian name',
+                   'father husband name', 'father guardian name'],
+    'dateOfBirth': ['dob', 'date of birth', 'birth date', 'birthdate', 'birthday', 'born on'],
+    'address': ['address', 'street', 'street address', 'addr', 'residential address', 'permanent address',
+                'postal address', 'address line 1', 'location'],
+    'city': ['city', 'town', 'city town', 'village town city'],
+    'state': ['state', 'province', 'state ut', 'state union territory'],
+    'pincode': ['pincode', 'pin', 'pin code', 'zip', 'zip code', 'postal code', 'postcode'],
+    'phone': ['phone', 'phone number', 'mobile', 'mobile number', 'contact', 'contact number', 'tel',
+              'telephone', 'cell', 'cell number', 'whatsapp number'],
+    'email': ['email', 'e mail', 'email address', 'email id', 'mail', 'mail id'],
+    'idNumber': ['id', 'id number', 'aadhaar', 'aadhar', 'aadhaar number', 'uid', 'pan', 'pan number',
+                 'passport number', 'identification', 'identification number', 'document number',
+                 'license number', 'licence number'],
+    'gender': ['gender', 'sex'],
+}
+
+# Token rewrites applied to labels and synonyms alike
+ABBREVIATIONS = {
+    'no': 'number', 'num': 'number', 'nbr': 'number', 'nr': 'number',
+    'mob': 'mobile', 'ph': 'phone', 'addr': 'address',
+    'dt': 'date', 'fathers': 'father', 'emailid': 'email id', 'mobileno': 'mobile number',
+    'aadhar': 'aadhaar', 'adhaar': 'aadhaar', 'zipcode': 'zip code',
+}
+STOPWORDS = {'of', 'the', 'your', 'enter', 'please', 'a', 'an', 'in', 'as', 'per', 'here', 'optional', 'answer'}
+# A label with one of these is about someone or something else ("Mother Name",
+# "Applicant Signature", "Alternate Mobile") unless the synonym itself has it
+BLOCKERS = {'mother', 'spouse', 'wife', 'nominee', 'witness', 'signature', 'sign', 'alternate', 'alternative',
+            'emergency', 'office', 'company', 'employer', 'bank', 'account', 'previous', 'reference', 'photo'}
+
+# Bump when scoring or pairing changes; stored analyses (pdf_forms.TemplateRegistry)
+# are remapped when this, the tables or the threshold change
+MATCHER_REVISION = 2
+MATCHER_VERSION = hashlib.sha256(json.dumps(
+    [MATCHER_REVISION, SYNONYMS, ABBREVIATIONS, sorted(STOPWORDS), sorted(BLOCKERS), FIELD_MATCH_MIN_SCORE]
+).encode()).hexdigest()[:16]
+
+_CAMEL = re.compile(r'([a-z0-9])([A-Z])')
+_POSSESSIVE = re.compile(r"['’]s\b")
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(label: str) -> Tuple[str, ...]:
+    """'fatherName', "Father's Name:", 'FATHER_NAME' -> ('father', 'name')"""
+    text = _POSSESSIVE.sub('', _CAMEL.sub(r'\1 \2', label)).lower()
+    tokens = []
+    for token in _NON_ALNUM.split(text):
+        if token and token not in STOPWORDS:
+            tokens.extend(ABBREVIATIONS.get(token, token).split())
+    return tuple(tokens)
+
+
+def _trigrams(compact: str) -> Set[str]:
+    padded = f' {compact} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class _Synonym:
+    key: str
+    tokens: Tuple[str, ...]
+    compact: str
+    trigrams: frozenset
+
+
+@dataclass(frozen=True)
+class FieldMatch:
+    field: str  # The label the form used
+    key: str  # ExtractedData attribute
+    score: float  # 1.0 exact ... FIELD_MATCH_MIN_SCORE
+
+
+def _build_index(synonyms: Dict[str, List[str]]):
+    entries: List[_Synonym] = []
+    by_token: Dict[str, Set[int]] = {}
+    by_trigram: Dict[str, Set[int]] = {}
+    for key, phrases in synonyms.items():
+        for phrase in [key] + phrases:
+            tokens = normalize(phrase)
+            compact = ''.join(tokens)
+            entry = _Synonym(key, tokens, compact, frozenset(_trigrams(compact)))
+            if entry in entries:
+                continue
+            index = len(entries)
+            entries.append(entry)
+            for token in tokens:
+                by_token.setdefault(token, set()).add(index)
+            for gram in entry.trigrams:
+                by_trigram.setdefault(gram, set()).add(index)
+    return entries, by_token, by_trigram
+
+
+_ENTRIES, _BY_TOKEN, _BY_TRIGRAM = _build_index(SYNONYMS)
+
+
+def _contains_run(tokens: Tuple[str, ...], run: Tuple[str, ...]) -> bool:
+    n = len(run)
+    return any(tokens[i:i + n] == run for i in range(len(tokens) - n + 1))
+
+
+def _score(tokens: Tuple[str, ...], compact: str, grams: Set[str], synonym: _Synonym) -> float:
+    if compact == synonym.compact:
+        return 1.0
+    coverage = len(synonym.tokens) / max(len(tokens), 1)
+    if synonym.tokens and _contains_run(tokens, synonym.tokens):
+        score = 0.6 + 0.3 * coverage  # Whole phrase, in order
+    elif synonym.tokens and set(synonym.tokens) <= set(tokens):
+        score = 0.55 + 0.3 * coverage  # 'name of father' for 'father name'
+    else:
+        shared = len(grams & synonym.trigrams)
+        score = 0.8 * shared / (len(grams) + len(synonym.trigrams) - shared)  # Misspellings, run-together words
+    if tokens[-1] in synonym.tokens:
+        score += 0.05  # The head noun comes last: 'Contact Email' is an email
+    if (BLOCKERS & set(tokens)) - set(synonym.tokens):
+        score *= 0.5
+    return score
+
+
+@lru_cache(maxsize=4096)
+def score_label(label: str) -> Dict[str, float]:
+    """Best score per key for one label, from the synonyms it shares a token or trigram with"""
+    tokens = normalize(label)
+    if not tokens:
+        return {}
+    compact = ''.join(tokens)
+    grams = _trigrams(compact)
+
+    candidates: Set[int] = set()
+    for token in tokens:
+        candidates |= _BY_TOKEN.get(token, set())
+    for gram in grams:
+        candidates |= _BY_TRIGRAM.get(gram, set())
+
+    scores: Dict[str, float] = {}
+    for index in candidates:
+        synonym = _ENTRIES[index]
+        score = _score(tokens, compact, grams, synonym)
+        if score > scores.get(synonym.key, 0.0):
+            scores[synonym.key] = score
+    return scores
+
+
+def _score_extra_key(label: str, key: str) -> float:
+    """Keys outside SYNONYMS (free-form fill data) only match on their own name"""
+    tokens = normalize(label)
+    synonym_tokens = normalize(key)
+    compact = ''.join(synonym_tokens)
+    synonym = _Synonym(key, synonym_tokens, compact, frozenset(_trigrams(compact)))
+    return _score(tokens, ''.join(tokens), _trigrams(''.join(tokens)), synonym) if tokens else 0.0
+
+
+Field = Union[str, Sequence[str]]
+
+
+@lru_cache(maxsize=FIELD_MATCH_CACHE_SIZE)
+def _match_layout(fields: Tuple[Tuple[str, ...], ...], keys: Tuple[str, ...],
+                  min_score: float, unique_keys: bool) -> Tuple[Optional[FieldMatch], ...]:
+    wanted = set(keys)
+    candidates = []
+    for position, labels in enumerate(fields):
+        best: Dict[str, Tuple[float, str]] = {}
+        for label in labels:
+            scores = dict(score_label(label))
+            for key in wanted - scores.keys() - SYNONYMS.keys():
+                scores[key] = _score_extra_key(label, key)
+            for key, score in scores.items():
+                if key in wanted and score >= min_score and score > best.get(key, (0.0, ''))[0]:
+                    best[key] = (score, label)
+        candidates.extend((score, position, key, label) for key, (score, label) in best.items())
+
+    # Best pairs first; ties go to the earlier field (and the alphabetically first key)
+    matches: List[Optional[FieldMatch]] = [None] * len(fields)
+    taken: Set[str] = set()
+    for score, position, key, label in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if matches[position] is None and key not in taken:
+            matches[position] = FieldMatch(label, key, round(score, 3))
+            if unique_keys:
+                taken.add(key)
+    return tuple(matches)
+
+
+def match_fields(fields: Sequence[Field], keys: Optional[Iterable[str]] = None,
+                 min_score: float = FIELD_MATCH_MIN_SCORE, unique_keys: bool = True) -> List[Optional[FieldMatch]]:
+    """Resolve a form layout to data keys.
+
+    Each field is a label, or several alternative labels for the same control
+    (name, id, visible label, placeholder). Returns one FieldMatch or None per
+    field, in order. keys limits matching to those keys (default: all of
+    ExtractedData); keys with no synonyms match on their own name. With
+    unique_keys (web forms) each key fills at most one field; without it
+    (PDF forms) every field gets its best key, so repeated fields all fill.
+    """
+    layout = tuple((field,) if isinstance(field, str) else tuple(label for label in field if label)
+                   for field in fields)
+    wanted = tuple(sorted(set(keys) if keys is not None else SYNONYMS.keys()))
+    return list(_match_layout(layout, wanted, min_score, unique_keys))
+
+
+def cache_info() -> Dict:
+    layouts = _match_layout.cache_info()
+    labels = score_label.cache_info()
+    return {
+        'layouts': {'hits': layouts.hits, 'misses': layouts.misses, 'size': layouts.currsize},
+        'labels': {'hits': labels.hits, 'misses': labels.misses, 'size': labels.currsize},
+    }
@@ -1,68 +1,42 @@
-import os
-from datetime import datetime
-from PyPDF2 import PdfReader, PdfWriter
+import io
+from typing import IO
+from starlette.concurrency import run_in_threadpool
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
-from playwright.async_api import async_playwright
-from config import OUTPUT_DIR
-import asyncio
+from browser_pool import browser_pool
+from review import review_manager
+from field_matcher import match_fields
+from output_store import output_store, StoredOutput
+from pdf_forms import template_cache
 
-async def fill_pdf(form_path: str, data: dict) -> str:
-    """Fill PDF form with actual data"""
+def render_pdf(form_path: str, data: dict) -> bytes:
+    """Fill PDF form with actual data; returns the PDF"""
     try:
-        reader = PdfReader(form_path)
-        writer = PdfWriter()
+        # Parsing and field -> key resolution happen once per template (cached by content hash)
+        form = template_cache.get(form_path)
         
-        has_fields = False
-        if reader.get_form_text_fields():
-            has_fields = True
-            
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            for page_num in range(len(writer.pages)):
-                page = writer.pages[page_num]
-                
-                if '/Annots' in page:
-                    for annot in page['/Annots']:
-                        try:
-                            field = annot.get_object()
-                            if '/T' in field:
-                                field_name = str(field['/T']).lower()
-                                
-                                for key, value in data.items():
-                                    if value and (key.lower() in field_name or field_name in key.lower()):
-                                        try:
-                                            writer.update_page_form_field_values(
-                                                page,
-                                                {field['/T']: str(value)}
-                                            )
-                                        except:
-                                            pass
-                        except:
-                            pass
-        
-        output_filename = f"filled_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
-        if has_fields:
-            with open(output_path, 'wb') as f:
-                writer.write(f)
-        else:
-            output_path = create_filled_pdf_overlay(data)
-        
-        return output_path
+        if form.template.fillable:
+            out = io.BytesIO()
+            form.write(data, out)
+            return out.getvalue()
         
     except Exception as e:
         print(f"PDF filling error: {str(e)}")
-        return create_filled_pdf_overlay(data)
+    
+    out = io.BytesIO()
+    create_filled_pdf_overlay(data, out)
+    return out.getvalue()
 
-def create_filled_pdf_overlay(data: dict) -> str:
+async def fill_pdf(form_path: str, data: dict) -> StoredOutput:
+    """Fill PDF form and save it to the output store under a unique name"""
+    # Rendering and the disk write both block, so neither runs on the event loop
+    return await run_in_threadpool(
+        lambda: output_store.save(lambda f: f.write(render_pdf(form_path, data)))
+    )
+
+def create_filled_pdf_overlay(data: dict, out: IO[bytes]):
     """Create filled PDF with data"""
-    output_filename = f"filled_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
-    
-    c = canvas.Canvas(output_path, pagesize=letter)
+    c = canvas.Canvas(out, pagesize=letter)
     width, height = letter
     
     c.setFont("Helvetica-Bold", 20)
@@ -109,234 +83,162 @@ def create_filled_pdf_overlay(data: dict) -> str:
                 y = height - 50
     
     c.save()
-    return output_path
 
-def find_chrome_path():
-    """Find Chrome installation path"""
-    import platform
-    
-    system = platform.system()
-    
-    if system == "Windows":
-        paths = [
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-            os.path.expanduser(r"~\AppData\Local\Google\Chrome\Application\chrome.exe"),
-        ]
-    elif system == "Darwin":
-        paths = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
-    else:
-        paths = [
-            "/usr/bin/google-chrome",
-            "/usr/bin/google-chrome-stable",
-            "/usr/bin/chromium",
-            "/usr/bin/chromium-browser",
-        ]
-    
-    for path in paths:
-        if os.path.exists(path):
-            return path
-    
-    return None
+GOOGLE_INPUT_SELECTOR = 'input[type="text"], input[type="email"], input[type="tel"], textarea, input[aria-label]'
+
+# Question texts, and which text input inside each question to fill, in one round trip.
+# input is the position among the question's GOOGLE_INPUT_SELECTOR matches (-1: none visible).
+GOOGLE_QUESTIONS_JS = """
+(selector) => Array.from(document.querySelectorAll('[role="listitem"]')).map((q, index) => {
+    const inputs = Array.from(q.querySelectorAll(selector));
+    const input = inputs.findIndex(el => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && window.getComputedStyle(el).visibility !== 'hidden';
+    });
+    return {index, text: q.innerText, input};
+})
+"""
 
 async def fill_google_form(page, data: dict) -> tuple:
     """Special handler for Google Forms"""
     print("🎯 Detected Google Form - using special handler\n")
     
-    filled_count = 0
-    failed_fields = []
+    # Wait for the questions to render rather than a fixed delay
+    await page.wait_for_selector('[role="listitem"]', timeout=10000)
     
-    # Wait for form to load
-    await asyncio.sleep(2)
+    # Index every question once, then match all of them to data keys in one pass
+    questions = await page.evaluate(GOOGLE_QUESTIONS_JS, GOOGLE_INPUT_SELECTOR)
+    print(f"📋 Found {len(questions)} questions in the form\n")
+    fillable = [q for q in questions if q['input'] >= 0]
+    values = {k: str(v).strip() for k, v in data.items() if v and str(v).strip()}
     
-    # Field mappings for Google Forms
-    field_mappings = {
-        'name': ['name', 'full name', 'your name', 'applicant'],
-        'fatherName': ['father', "father's name", 'parent', 'guardian'],
-        'dateOfBirth': ['dob', 'date of birth', 'birth', 'birthday'],
-        'address': ['address', 'street', 'location'],
-        'city': ['city', 'town'],
-        'state': ['state', 'province'],
-        'pincode': ['pincode', 'pin', 'zip', 'postal'],
-        'phone': ['phone', 'mobile', 'contact', 'number'],
-        'email': ['email', 'e-mail', 'mail'],
-        'idNumber': ['id', 'aadhaar', 'aadhar', 'identification'],
-        'gender': ['gender', 'sex']
-    }
+    # The title is the first line; the rest is "*", help text and "Your answer"
+    titles = [next((line for line in q['text'].splitlines() if line.strip()), '') for q in fillable]
+    question_for = {m.key: q for q, m in zip(fillable, match_fields(titles, keys=values)) if m}
     
-    # Get all form questions
-    questions = await page.query_selector_all('[role="listitem"]')
-    print(f"📋 Found {len(questions)} questions in the form\n")
+    items = page.locator('[role="listitem"]')
+    filled_count = 0
+    failed_fields = []
     
-    for key, value in data.items():
-        if not value or not str(value).strip():
+    for key, value in values.items():
+        question = question_for.get(key)
+        if question is None:
+            failed_fields.append(key)
+            print(f"   ❌ Could not fill: {key}")
             continue
         
-        value = str(value).strip()
-        print(f"🔍 Trying to fill: {key} = '{value}'")
-        
-        field_filled = False
-        possible_labels = field_mappings.get(key, [key])
-        
-        # Try to find matching question
-        for question in questions:
-            try:
-                # Get question text
-                question_text = await question.inner_text()
-                question_text_lower = question_text.lower()
-                
-                # Check if any possible label matches this question
-                matched = False
-                for label in possible_labels:
-                    if label.lower() in question_text_lower:
-                        matched = True
-                        break
-                
-                if not matched:
-                    continue
-                
-                print(f"   ✓ Found question: {question_text[:50]}...")
-                
-                # Try to find input field within this question
-                # Google Forms uses specific input types
-                input_selectors = [
-                    'input[type="text"]',
-                    'input[type="email"]',
-                    'input[type="tel"]',
-                    'textarea',
-                    'input[aria-label]'
-                ]
-                
-                for selector in input_selectors:
-                    try:
-                        input_field = await question.query_selector(selector)
-                        
-                        if input_field:
-                            # Check if visible
-                            is_visible = await input_field.is_visible()
-                            if not is_visible:
-                                continue
-                            
-                            # Click and fill
-                            await input_field.click()
-                            await asyncio.sleep(0.3)
-                            
-                            # Clear existing content
-                            await input_field.fill('')
-                            await asyncio.sleep(0.2)
-                            
-                            # Type value
-                            await input_field.type(value, delay=30)
-                            
-                            # Verify it was filled
-                            await asyncio.sleep(0.3)
-                            filled_value = await input_field.input_value()
-                            
-                            if filled_value:
-                                print(f"   ✅ Successfully filled with: {value}")
-                                filled_count += 1
-                                field_filled = True
-                                break
-                    except:
-                        continue
-                
-                if field_filled:
-                    break
-                    
-            except Exception as e:
-                continue
-        
-        if not field_filled:
+        try:
+            # fill() waits for the input to be editable and fires the input events itself
+            await items.nth(question['index']).locator(GOOGLE_INPUT_SELECTOR).nth(question['input']).fill(value)
+        except Exception as e:
             failed_fields.append(key)
-            print(f"   ❌ Could not fill: {key}")
+            print(f"   ❌ Could not fill: {key} ({e})")
+            continue
+        
+        filled_count += 1
+        print(f"   ✅ {question['text'][:50]!r} = {value}")
     
     return filled_count, failed_fields
 
+# Lists every form control in one round trip. The elements are kept on window
+# so FILL_FIELDS_JS can address them by index without re-querying the DOM.
+SNAPSHOT_FIELDS_JS = """
+() => {
+    const els = Array.from(document.querySelectorAll('input, select, textarea'));
+    window.__formFillerFields = els;
+    const controls = 'input:not([type="hidden"]), select, textarea';
+    const labelOf = (el) => {
+        // el.labels covers both <label for=...> and a wrapping <label>
+        if (el.labels && el.labels.length) return el.labels[0].innerText;
+        if (el.getAttribute('aria-label')) return el.getAttribute('aria-label');
+        // A group's label names the control only if the group holds no other control;
+        // otherwise every input in a layout wrapper would take its first label
+        const group = el.closest('.form-group, [role="listitem"]');
+        if (group && group.querySelectorAll(controls).length === 1) {
+            const label = group.querySelector('label');
+            if (label) return label.innerText;
+        }
+        const previous = el.previousElementSibling;
+        if (previous && previous.tagName === 'LABEL' && !previous.htmlFor) return previous.innerText;
+        return '';
+    };
+    return els.map((el, index) => {
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        return {
+            index,
+            tag: el.tagName.toLowerCase(),
+            type: (el.getAttribute('type') || '').toLowerCase(),
+            name: el.getAttribute('name') || '',
+            id: el.id || '',
+            label: labelOf(el).trim(),
+            placeholder: el.getAttribute('placeholder') || '',
+            visible: style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0,
+        };
+    });
+}
+"""
+
+# Writes [{index, value}] in one round trip, firing the events frameworks listen for.
+# Returns the indexes that took the value.
+FILL_FIELDS_JS = """
+(items) => {
+    const els = window.__formFillerFields || [];
+    const filled = [];
+    for (const {index, value} of items) {
+        const el = els[index];
+        if (!el || !el.isConnected) continue;
+        if (el.tagName === 'SELECT') {
+            const wanted = value.toLowerCase();
+            const option = Array.from(el.options).find(
+                o => o.value.toLowerCase() === wanted || o.text.trim().toLowerCase() === wanted);
+            if (!option) continue;
+            el.value = option.value;
+        } else {
+            // The native setter keeps React-style controlled inputs in sync
+            const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+            Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+        }
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        filled.push(index);
+    }
+    return filled;
+}
+"""
+
+FILLABLE_INPUT_TYPES = {'', 'text', 'email', 'tel', 'number', 'date', 'search', 'url'}
+
 async def fill_standard_form(page, data: dict) -> tuple:
     """Handler for standard HTML forms"""
     print("🎯 Standard HTML form detected\n")
     
-    filled_count = 0
-    failed_fields = []
+    # One round trip for the whole form, then match in Python
+    fields = await page.evaluate(SNAPSHOT_FIELDS_JS)
+    fields = [f for f in fields
+              if f['visible'] and (f['tag'] != 'input' or f['type'] in FILLABLE_INPUT_TYPES)]
+    print(f"📋 Found {len(fields)} fillable fields\n")
     
-    field_mappings = {
-        'name': ['name', 'fullname', 'full_name', 'full-name'],
-        'fatherName': ['father', 'father_name', 'fathername'],
-        'dateOfBirth': ['dob', 'date_of_birth', 'birthdate'],
-        'address': ['address', 'street', 'addr'],
-        'city': ['city', 'town'],
-        'state': ['state', 'province'],
-        'pincode': ['pincode', 'pin', 'zip', 'postal'],
-        'phone': ['phone', 'mobile', 'contact', 'tel'],
-        'email': ['email', 'mail'],
-        'idNumber': ['id', 'aadhaar', 'pan'],
-        'gender': ['gender', 'sex']
-    }
+    values = {k: str(v).strip() for k, v in data.items() if v and str(v).strip()}
+    matches = match_fields([(f['name'], f['id'], f['label'], f['placeholder']) for f in fields], keys=values)
+    planned = [(m.key, f, values[m.key]) for f, m in zip(fields, matches) if m]
     
-    for key, value in data.items():
-        if not value or not str(value).strip():
-            continue
-        
-        value = str(value).strip()
-        print(f"🔍 Filling: {key} = '{value}'")
-        
-        field_filled = False
-        possible_names = field_mappings.get(key, [key])
-        
-        for field_name in possible_names:
-            if field_filled:
-                break
-            
-            selectors = [
-                f'input[name="{field_name}"]',
-                f'input[id="{field_name}"]',
-                f'textarea[name="{field_name}"]',
-                f'select[name="{field_name}"]',
-            ]
-            
-            for selector in selectors:
-                try:
-                    element = await page.query_selector(selector)
-                    
-                    if not element:
-                        continue
-                    
-                    is_visible = await element.is_visible()
-                    if not is_visible:
-                        continue
-                    
-                    tag_name = await element.evaluate('el => el.tagName.toLowerCase()')
-                    
-                    if tag_name == 'select':
-                        try:
-                            await element.select_option(value=value)
-                            print(f"   ✅ Filled dropdown: {selector}")
-                            filled_count += 1
-                            field_filled = True
-                            break
-                        except:
-                            pass
-                    
-                    elif tag_name in ['input', 'textarea']:
-                        await element.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.2)
-                        await element.click()
-                        await asyncio.sleep(0.2)
-                        await element.fill(value)
-                        
-                        print(f"   ✅ Filled: {selector}")
-                        filled_count += 1
-                        field_filled = True
-                        break
-                
-                except:
-                    continue
-        
-        if not field_filled:
-            failed_fields.append(key)
-            print(f"   ❌ Not found: {key}")
+    # One round trip to write every value
+    filled = set(await page.evaluate(
+        FILL_FIELDS_JS, [{'index': f['index'], 'value': value} for _, f, value in planned]))
     
-    return filled_count, failed_fields
+    filled_keys = set()
+    for key, field, value in planned:
+        if field['index'] in filled:
+            filled_keys.add(key)
+            print(f"   ✅ Filled: {field['tag']}[name=\"{field['name'] or field['id']}\"] = '{value}'")
+    
+    failed_fields = [key for key, value in data.items()
+                     if value and str(value).strip() and key not in filled_keys]
+    for key in failed_fields:
+        print(f"   ❌ Not found: {key}")
+    
+    return len(filled_keys), failed_fields
 
 async def fill_url(url: str, data: dict) -> dict:
     """
@@ -347,37 +249,19 @@ async def fill_url(url: str, data: dict) -> dict:
     print("="*70)
     
     try:
-        chrome_path = find_chrome_path()
-        
-        if not chrome_path:
-            print("❌ Chrome not found!")
-            return {
-                'success': False,
-                'message': 'Chrome browser not found',
-                'filled_count': 0
-            }
-        
-        print(f"✅ Chrome: {chrome_path}")
         print(f"📍 URL: {url}\n")
         
-        async with async_playwright() as p:
-            print("🌐 Launching browser...")
-            
-            browser = await p.chromium.launch(
-                headless=False,
-                executable_path=chrome_path,
-                args=['--start-maximized']
-            )
-            
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080}
-            )
-            
+        # Isolated context on a warm browser; released in the background after the block
+        async with browser_pool.context() as context:
             page = await context.new_page()
             
             print("📂 Opening page...")
             await page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            await asyncio.sleep(3)
+            try:
+                # Let script-rendered forms settle; static pages return at once
+                await page.wait_for_load_state('networkidle', timeout=5000)
+            except Exception:
+                pass
             
             print("✅ Page loaded!\n")
             
@@ -403,20 +287,17 @@ async def fill_url(url: str, data: dict) -> dict:
                 print(f"   Missing: {', '.join(failed_fields)}")
             print("="*70 + "\n")
             
-            print("⏳ Browser stays open for 60 seconds")
-            print("👉 Review and submit manually\n")
-            
-            await asyncio.sleep(60)
-            
-            print("🔚 Closing browser...\n")
-            await browser.close()
+            # Hand the filled page to review instead of holding the request open
+            review = await review_manager.create(context, page, url, filled_count, failed_fields)
+            print(f"👉 Review session {review.id} (expires in {review_manager.ttl}s)\n")
             
             return {
                 'success': True,
                 'message': f'Filled {filled_count}/{len(data)} fields',
                 'filled_count': filled_count,
                 'total_fields': len(data),
-                'failed_fields': failed_fields
+                'failed_fields': failed_fields,
+                'review': review.to_dict()
             }
     
     except Exception as e:
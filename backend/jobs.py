@@ -0,0 +1,193 @@
+import asyncio
+import json
+import time
+import traceback
+import uuid
+from dataclasses import dataclass, field, asdict
+from typing import AsyncIterator, Dict, List, Optional
+
+from config import JOB_WORKERS, JOB_QUEUE_SIZE, JOB_RESULT_TTL
+from models import ExtractedData
+from extractor import extract_document, merge_data
+from workers import ocr_limiter, run_extraction
+
+
+@dataclass
+class DocumentProgress:
+    """Progress of one document inside an extraction job"""
+    filename: str
+    path: str
+    sha256: str = ""
+    status: str = "queued"  # queued | running | done | failed
+    stage: str = ""
+    variants_ocred: int = 0
+    ocr_calls: int = 0
+    fields_found: List[str] = field(default_factory=list)
+    redundant_texts: int = 0
+    agreement: Dict[str, float] = field(default_factory=dict)
+    error: str = ""
+
+
+@dataclass
+class ExtractionJob:
+    """A multi-document extraction running in the background queue"""
+    id: str
+    document_type: str
+    documents: List[DocumentProgress]
+    status: str = "queued"  # queued | running | done | failed
+    result: Optional[Dict] = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    version: int = 0
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def touch(self):
+        """Bump the version and wake every event stream watching this job"""
+        self.version += 1
+        self.updated_at = time.time()
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            "jobId": self.id,
+            "documentType": self.document_type,
+            "status": self.status,
+            "documents": [
+                {k: v for k, v in asdict(doc).items() if k != "path"} for doc in self.documents
+            ],
+            "extractedData": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+        }
+
+
+class JobManager:
+    """Bounded background queue for document extraction jobs"""
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE):
+        self.jobs: Dict[str, ExtractionJob] = {}
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        print(f"Job queue started with {self.worker_count} worker(s)")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, document_type: str, files: List[Dict]) -> ExtractionJob:
+        """Queue saved files for extraction; raises asyncio.QueueFull when saturated"""
+        self._purge_expired()
+
+        job = ExtractionJob(
+            id=uuid.uuid4().hex,
+            document_type=document_type,
+            documents=[DocumentProgress(filename=f["filename"], path=f["path"], sha256=f.get("sha256", ""))
+                       for f in files],
+        )
+        self.queue.put_nowait(job)
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ExtractionJob]:
+        return self.jobs.get(job_id)
+
+    def is_active(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        return job is not None and not job.finished
+
+    async def events(self, job: ExtractionJob, heartbeat: float = 15.0) -> AsyncIterator[str]:
+        """Server-Sent Events stream of job snapshots until the job finishes"""
+        last_version = -1
+        while True:
+            changed = job.changed
+            if job.version != last_version:
+                last_version = job.version
+                yield f"event: {'result' if job.finished else 'progress'}\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                traceback.print_exc()
+                job.status = "failed"
+                job.error = str(e)
+                job.touch()
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: ExtractionJob):
+        loop = asyncio.get_running_loop()
+        limiter = ocr_limiter()  # All of the job's documents share one slice of the OCR pool
+        job.status = "running"
+        job.touch()
+
+        async def run_document(doc: DocumentProgress) -> Optional[ExtractedData]:
+            def on_progress(update: Dict):
+                # Called from the extraction thread; apply on the event loop
+                loop.call_soon_threadsafe(apply_progress, update)
+
+            def apply_progress(update: Dict):
+                doc.stage = update.get("stage", doc.stage)
+                doc.variants_ocred = update.get("variants_ocred", doc.variants_ocred)
+                doc.ocr_calls = update.get("ocr_calls", doc.ocr_calls)
+                doc.fields_found = update.get("fields_found", doc.fields_found)
+                doc.redundant_texts = update.get("redundant_texts", doc.redundant_texts)
+                doc.agreement = update.get("agreement", doc.agreement)
+                job.touch()
+
+            doc.status = "running"
+            job.touch()
+            try:
+                data = await run_extraction(extract_document, doc.path, on_progress, doc.sha256 or None, limiter)
+            except Exception as e:
+                doc.status = "failed"
+                doc.error = str(e)
+                job.touch()
+                return None
+
+            doc.status = "done"
+            if data is not None:
+                doc.fields_found = [k for k, v in data.dict().items() if v]
+            job.touch()
+            return data
+
+        results = await asyncio.gather(*(run_document(doc) for doc in job.documents))
+        extracted = [data for data in results if data is not None]
+
+        final_data = merge_data(extracted) if extracted else ExtractedData()
+        job.result = final_data.dict()
+        job.status = "done"
+        job.touch()
+        print(f"Job {job.id} finished: {len(extracted)}/{len(job.documents)} document(s) extracted")
+
+    def _purge_expired(self):
+        cutoff = time.time() - JOB_RESULT_TTL
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.updated_at < cutoff]:
+            del self.jobs[job_id]
+
+
+job_manager = JobManager()
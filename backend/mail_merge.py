@@ -0,0 +1,348 @@
+"""Bulk PDF form filling: one template, many records.
+
+Records come from CSV or JSON Lines and are read lazily. The template is
+parsed once per worker process (pdf_forms.PreparedForm) and each record is
+filled there, with a bounded number in flight, so memory stays flat however
+many records there are. Results come back in record order as either
+
+  - a zip with one PDF per record (plus summary.json), streamed as it is built, or
+  - one concatenated PDF, written object by object as records arrive.
+
+Either way the run's throughput summary is logged and kept in recent_merges
+(served at /api/stats/merge).
+
+For the concatenated PDF each worker also renumbers its record's objects into
+a fixed block of object numbers (the template's object count), so the parent
+process only copies bytes and keeps an offset per object. Each record's
+fields are grouped under a parent field 'r<n>' so names stay unique.
+
+    python mail_merge.py form.pdf records.csv --output filled.zip
+    python mail_merge.py form.pdf records.jsonl --output filled.pdf
+"""
+import argparse
+import collections
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, BooleanObject, DictionaryObject, IndirectObject, NameObject,
+                            NumberObject, TextStringObject)
+
+from config import MERGE_WORKERS
+from pdf_forms import TemplateCache
+
+logger = logging.getLogger(__name__)
+
+PAGES_OBJ, CATALOG_OBJ, ACROFORM_OBJ = 1, 2, 3
+FIRST_RECORD_OBJ = 4
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Dict[str, str]]:
+    """Yield data dicts from a CSV (header row) or JSON Lines text stream"""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {k: v for k, v in row.items() if k}
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield {k: str(v) for k, v in json.loads(line).items() if v is not None}
+    else:
+        raise ValueError(f"Unsupported record format: {fmt}")
+
+
+def _renumber(roots: List[IndirectObject], base: int) -> List[Tuple[int, object]]:
+    """Give every object reachable from roots a number from base up; returns (number, object) in order.
+
+    References are rewritten in place (the reader is thrown away afterwards).
+    References with no reader behind them already point at shared objects.
+    """
+    numbers: Dict[int, int] = {}
+    ordered: List[Tuple[int, object]] = []
+    pending = collections.deque()
+
+    def ref(indirect: IndirectObject) -> IndirectObject:
+        if indirect.pdf is None:
+            return indirect  # Already points at a shared object
+        if indirect.idnum not in numbers:
+            numbers[indirect.idnum] = base + len(ordered)
+            obj = indirect.get_object()
+            ordered.append((numbers[indirect.idnum], obj))
+            pending.append(obj)
+        return IndirectObject(numbers[indirect.idnum], 0, None)
+
+    def visit(container):
+        items = dict.items(container) if isinstance(container, DictionaryObject) else enumerate(container)
+        for key, value in list(items):
+            if isinstance(value, IndirectObject):
+                container[key] = ref(value)
+            elif isinstance(value, (DictionaryObject, ArrayObject)):
+                visit(value)
+
+    for root in roots:
+        ref(root)
+    while pending:
+        visit(pending.popleft())
+    return ordered
+
+
+class RecordRenderer:
+    """Per-process state: the prepared template and its object block size"""
+
+    def __init__(self, form_path: str):
+        self.form = TemplateCache(max_entries=1).get(form_path)
+        self.stride = 0
+        self.stride = len(self.segment({}, 0)[1])
+
+    def filled(self, data: Dict[str, str]) -> bytes:
+        out = io.BytesIO()
+        self.form.write(data, out)
+        return out.getvalue()
+
+    def segment(self, data: Dict[str, str], index: int) -> Tuple[bytes, List[Tuple[int, int]], List[int], int, Optional[int]]:
+        """The record's objects serialized for the concatenated PDF.
+
+        Returns (bytes, [(object number, offset in bytes)], page object numbers,
+        the record's parent field number, its copy of the form's /DR resources).
+        """
+        reader = PdfReader(io.BytesIO(self.filled(data)))
+        base = FIRST_RECORD_OBJ + index * self.stride
+        group = base  # The parent field takes the first number of the block
+
+        root = reader.trailer['/Root']
+        pages = list(root['/Pages']['/Kids'])  # PdfWriter output: a flat page tree
+        for page in pages:
+            page.get_object()[NameObject('/Parent')] = IndirectObject(PAGES_OBJ, 0, None)
+        acroform = root['/AcroForm'] if '/AcroForm' in root else DictionaryObject()
+        fields = list(acroform['/Fields']) if '/Fields' in acroform else []
+        resources = acroform.raw_get('/DR') if '/DR' in acroform else None
+        roots = pages + fields + ([resources] if isinstance(resources, IndirectObject) else [])
+        objects = _renumber(roots, base + 1)
+        if self.stride and len(objects) + 1 > self.stride:
+            raise ValueError(f"Record {index} needs {len(objects) + 1} objects, block is {self.stride}")
+
+        numbers = {id(obj): num for num, obj in objects}
+        kids = ArrayObject()
+        for f in fields:
+            field_obj = f.get_object()
+            field_obj[NameObject('/Parent')] = IndirectObject(group, 0, None)
+            kids.append(IndirectObject(numbers[id(field_obj)], 0, None))
+        parent = DictionaryObject({NameObject('/T'): TextStringObject(f"r{index + 1}"), NameObject('/Kids'): kids})
+
+        out = io.BytesIO()
+        offsets = []
+        for num, obj in [(group, parent)] + objects:
+            offsets.append((num, out.tell()))
+            out.write(f"{num} 0 obj\n".encode())
+            obj.write_to_stream(out, None)
+            out.write(b"\nendobj\n")
+        page_numbers = [numbers[id(p.get_object())] for p in pages]
+        resources_number = numbers.get(id(resources.get_object())) if isinstance(resources, IndirectObject) else None
+        return out.getvalue(), offsets, page_numbers, group, resources_number
+
+
+_renderer: Optional[RecordRenderer] = None
+
+def _init_worker(form_path: str):
+    global _renderer
+    _renderer = RecordRenderer(form_path)
+
+def _fill(data: Dict[str, str]) -> bytes:
+    return _renderer.filled(data)
+
+def _segment(data: Dict[str, str], index: int):
+    return _renderer.segment(data, index)
+
+
+def _ordered_map(pool: ProcessPoolExecutor, func, jobs: Iterable[tuple], window: int) -> Iterator:
+    """pool.map with at most window jobs in flight, so records are read only as fast as they are written"""
+    in_flight = collections.deque()
+    for job in jobs:
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+        in_flight.append(pool.submit(func, *job))
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target whose bytes are drained by the streaming generator"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class MergeStats:
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+
+    def summary(self) -> Dict:
+        seconds = time.perf_counter() - self.start
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'seconds': round(seconds, 3),
+            'recordsPerSecond': round(self.records / seconds, 2) if seconds else 0.0,
+        }
+
+    def finish(self, output: str) -> Dict:
+        """Log the completed run's summary and keep it in recent_merges"""
+        summary = dict(self.summary(), output=output, finishedAt=time.time())
+        recent_merges.append(summary)
+        logger.info(f"📑 Bulk fill ({output}): {self.records} record(s), {self.bytes} bytes "
+                    f"in {summary['seconds']}s ({summary['recordsPerSecond']} records/s)")
+        return summary
+
+
+recent_merges: Deque[Dict] = collections.deque(maxlen=20)  # Latest completed runs, oldest first
+
+
+def merge_zip(form_path: str, records: Iterable[Dict[str, str]], stats: MergeStats,
+              name_field: Optional[str] = None, workers: int = MERGE_WORKERS) -> Iterator[bytes]:
+    """Zip of one filled PDF per record, yielded in chunks as it is built"""
+    sink = _ChunkSink()
+    names = collections.deque()
+
+    def jobs():
+        for index, data in enumerate(records):
+            names.append(data.get(name_field) if name_field else None)
+            yield (data,)
+
+    with _pool(form_path, workers) as pool, zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for index, pdf in enumerate(_ordered_map(pool, _fill, jobs(), workers * 4)):
+            name = names.popleft()
+            archive.writestr(f"{index + 1:06d}{'-' + _safe_name(name) if name else ''}.pdf", pdf)
+            stats.records += 1
+            stats.bytes += len(pdf)
+            yield sink.drain()
+        archive.writestr("summary.json", json.dumps(stats.finish("zip"), indent=2))
+    yield sink.drain()
+
+
+def merge_pdf(form_path: str, records: Iterable[Dict[str, str]], stats: MergeStats,
+              workers: int = MERGE_WORKERS) -> Iterator[bytes]:
+    """One PDF holding every record's pages, yielded in chunks as records complete"""
+    renderer = RecordRenderer(form_path)  # For the shared /DA
+    position = 0
+    offsets: Dict[int, int] = {}
+    page_numbers: List[int] = []
+    groups: List[int] = []
+    resources: Optional[int] = None
+    last = ACROFORM_OBJ
+
+    def emit(data: bytes) -> bytes:
+        nonlocal position
+        position += len(data)
+        return data
+
+    yield emit(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    jobs = ((data, index) for index, data in enumerate(records))
+    with _pool(form_path, workers) as pool:
+        for segment, segment_offsets, pages, group, record_resources in _ordered_map(pool, _segment, jobs, workers * 4):
+            for num, offset in segment_offsets:
+                offsets[num] = position + offset
+                last = max(last, num)
+            page_numbers.extend(pages)
+            groups.append(group)
+            resources = resources or record_resources
+            stats.records += 1
+            stats.bytes += len(segment)
+            yield emit(segment)
+
+    root = renderer.form.writer._root_object
+    source = root['/AcroForm'] if '/AcroForm' in root else DictionaryObject()
+    acroform = DictionaryObject({
+        NameObject('/Fields'): ArrayObject(IndirectObject(g, 0, None) for g in groups),
+        NameObject('/NeedAppearances'): BooleanObject(True),
+    })
+    if '/DA' in source:
+        acroform[NameObject('/DA')] = source['/DA']
+    if resources:
+        acroform[NameObject('/DR')] = IndirectObject(resources, 0, None)  # The first record's copy
+    trailer_objects = [
+        (PAGES_OBJ, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(IndirectObject(n, 0, None) for n in page_numbers),
+            NameObject('/Count'): NumberObject(len(page_numbers)),
+        })),
+        (CATALOG_OBJ, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(PAGES_OBJ, 0, None),
+            NameObject('/AcroForm'): IndirectObject(ACROFORM_OBJ, 0, None),
+        })),
+        (ACROFORM_OBJ, acroform),
+    ]
+    for num, obj in trailer_objects:
+        offsets[num] = position
+        out = io.BytesIO()
+        out.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(out, None)
+        out.write(b"\nendobj\n")
+        yield emit(out.getvalue())
+
+    # Unused numbers in a record's block are listed as free
+    xref = [f"xref\n0 {last + 1}\n0000000000 65535 f \n"]
+    xref.extend(f"{offsets[num]:010d} 00000 n \n" if num in offsets else "0000000000 65535 f \n"
+                for num in range(1, last + 1))
+    xref.append(f"trailer\n<< /Size {last + 1} /Root {CATALOG_OBJ} 0 R >>\nstartxref\n{position}\n%%EOF\n")
+    yield emit("".join(xref).encode())
+    stats.finish("pdf")
+
+
+def _pool(form_path: str, workers: int) -> ProcessPoolExecutor:
+    # Spawned, not forked: the server process holds threads and locks
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(form_path,))
+
+
+def _safe_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name))[:64]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill one PDF form template for many records")
+    parser.add_argument("form", help="AcroForm PDF template")
+    parser.add_argument("records", help="CSV (with header) or JSON Lines file, '-' for stdin")
+    parser.add_argument("--output", "-o", required=True, help=".zip (one PDF per record) or .pdf (concatenated)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="record format (default: from extension)")
+    parser.add_argument("--name-field", help="record field used in zip entry names")
+    parser.add_argument("--workers", type=int, default=MERGE_WORKERS)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.records.endswith(".csv") else "jsonl")
+    stats = MergeStats()
+    with (sys.stdin if args.records == "-" else open(args.records, newline="")) as source, \
+            open(args.output, "wb") as out:
+        records = read_records(source, fmt)
+        if args.output.endswith(".pdf"):
+            chunks = merge_pdf(args.form, records, stats, args.workers)
+        else:
+            chunks = merge_zip(args.form, records, stats, args.name_field, args.workers)
+        for chunk in chunks:
+            out.write(chunk)
+    print(json.dumps(stats.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,44 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import asyncio
+import hashlib
+import io
+import json
 import os
-import shutil
+import time
 import traceback
 
-from config import UPLOAD_DIR, OUTPUT_DIR, SAMPLE_FORMS_DIR, PORT
+from config import (UPLOAD_DIR, SAMPLE_FORMS_DIR, PORT,
+                    MAX_DOCUMENT_BYTES, MAX_FORM_BYTES, MAX_UPLOAD_REQUEST_BYTES,
+                    MAX_BATCH_BYTES, BATCH_MANIFEST_DIR, BATCH_OUTPUT_DIR, BATCH_UPLOAD_DIR)
 from models import ExtractedData, FillRequest, URLFillRequest
-from extractor import extract_text_from_pdf, extract_text_from_image, extract_data_from_text, merge_data
-from filler import fill_pdf, fill_url
+from extractor import extract_document, merge_data, cascade_stats
+from workers import ocr_limiter, run_extraction
+from jobs import job_manager
+from batch import run_batch
+from mail_merge import MergeStats, merge_pdf, merge_zip, read_records, recent_merges
+from cache import extraction_cache
+from ocr_dedup import dedup_stats
+from uploads import RequestSizeLimit, save_upload
+from filler import fill_pdf, fill_url, render_pdf
+from output_store import output_store, file_response, bytes_response
+from pdf_forms import template_cache, template_registry
+from browser_pool import browser_pool
+from review import review_manager
+from retention import retention_manager
 
 app = FastAPI(title="AI Form Filler API", version="1.0.0")
 
+# Caps whole request bodies as they stream in; per-file limits are applied in save_upload.
+# Added before CORS so CORS wraps it and its 413s carry CORS headers.
+app.add_middleware(RequestSizeLimit, limits={
+    "/api/upload": MAX_UPLOAD_REQUEST_BYTES,
+    "/api/batch": MAX_BATCH_BYTES,
+})
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,6 +47,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    job_manager.start()
+    review_manager.start()
+    retention_manager.start(in_use=job_manager.is_active)
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        # Extraction still works; the pool retries on the first URL fill
+        print(f"Browser pool not started: {e}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_manager.stop()
+    await review_manager.stop()
+    await retention_manager.stop()
+    await browser_pool.stop()
+
 @app.get("/")
 def root():
     return {
@@ -33,61 +77,74 @@ def root():
 def health():
     return {"status": "healthy"}
 
+@app.get("/api/stats/ocr")
+def ocr_stats():
+    return {"success": True, "cascade": cascade_stats.snapshot(), "dedup": dedup_stats.snapshot()}
+
+@app.get("/api/stats/cache")
+def cache_stats():
+    return {"success": True, "cache": extraction_cache.stats(), "formTemplates": template_cache.stats(),
+            "templateRegistry": template_registry.stats()}
+
+@app.get("/api/stats/storage")
+def storage_stats():
+    return {"success": True, **retention_manager.stats()}
+
+@app.get("/api/stats/merge")
+def merge_stats():
+    """Throughput of the latest bulk fills (the zip output also carries it as summary.json)"""
+    return {"success": True, "recent": list(recent_merges)}
+
+@app.get("/api/stats/browsers")
+def browser_stats():
+    return {**browser_pool.stats(), "reviews": review_manager.stats()}
+
 @app.post("/api/upload-documents")
 async def upload_documents(
     documents: List[UploadFile] = File(...),
-    documentType: str = Form(...)
+    documentType: str = Form(...),
+    asyncMode: bool = Form(False)
 ):
     try:
         print(f"\n{'='*60}")
         print(f"Processing {len(documents)} document(s) of type: {documentType}")
         print(f"{'='*60}\n")
         
-        # Ensure upload directory exists
-        os.makedirs(os.path.join(UPLOAD_DIR, "documents"), exist_ok=True)
-        
         uploaded_files = []
-        extracted_data_list = []
         
         for i, doc in enumerate(documents):
             print(f"\n--- Document {i+1}: {doc.filename} ---")
             
-            file_path = os.path.join(UPLOAD_DIR, "documents", doc.filename)
-            
-            # Save uploaded file
-            with open(file_path, "wb") as f:
-                content = await doc.read()
-                f.write(content)
-            
-            print(f"Saved to: {file_path}")
-            uploaded_files.append({"filename": doc.filename, "path": file_path})
-            
-            # Extract text based on file type
-            ext = os.path.splitext(doc.filename)[1].lower()
-            text = ""
-            
-            print(f"File extension: {ext}")
+            # Stream to a content-addressed path, hashing on the way
+            stored = await save_upload(doc, os.path.join(UPLOAD_DIR, "documents"), MAX_DOCUMENT_BYTES)
             
-            if ext == '.pdf':
-                print("Extracting from PDF...")
-                text = extract_text_from_pdf(file_path)
-            elif ext in ['.jpg', '.jpeg', '.png']:
-                print("Extracting from image using OCR...")
-                text = extract_text_from_image(file_path)
-            else:
-                print(f"Unsupported file type: {ext}")
-            
-            print(f"Extracted text length: {len(text)} characters")
+            print(f"Saved to: {stored.path} ({stored.size} bytes)")
+            uploaded_files.append(stored.to_dict())
+        
+        if asyncMode:
+            try:
+                job = job_manager.submit(documentType, uploaded_files)
+            except asyncio.QueueFull:
+                raise HTTPException(status_code=503, detail="Extraction queue is full, retry later")
             
-            if text:
-                print(f"\nFirst 300 characters of extracted text:")
-                print(f"{text[:300]}\n")
-                
-                # Extract structured data
-                data = extract_data_from_text(text)
-                extracted_data_list.append(data)
-            else:
-                print("WARNING: No text extracted from document!")
+            for uploaded in uploaded_files:
+                retention_manager.claim(uploaded["path"], job.id)  # Kept until the job finishes
+            print(f"Queued extraction job {job.id}")
+            return {
+                "success": True,
+                "jobId": job.id,
+                "files": uploaded_files,
+                "statusUrl": f"/api/jobs/{job.id}",
+                "eventsUrl": f"/api/jobs/{job.id}/events"
+            }
+        
+        # Extract all documents concurrently, off the event loop, within one share of the OCR pool
+        limiter = ocr_limiter()
+        results = await asyncio.gather(*(
+            run_extraction(extract_document, uploaded["path"], None, uploaded["sha256"], limiter)
+            for uploaded in uploaded_files
+        ))
+        extracted_data_list = [data for data in results if data is not None]
         
         # Merge data from all documents
         final_data = merge_data(extracted_data_list) if extracted_data_list else ExtractedData()
@@ -106,6 +163,8 @@ async def upload_documents(
             "extractedData": final_data.dict()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"\n{'!'*60}")
         print(f"ERROR in upload_documents:")
@@ -114,24 +173,89 @@ async def upload_documents(
         print(f"{'!'*60}\n")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, **job.to_dict()}
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_manager.events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/batch")
+async def batch_extract(
+    manifest: Optional[UploadFile] = File(None),
+    manifestPath: Optional[str] = Form(None),
+    resume: bool = Form(True)
+):
+    """Extract a zip (or server-side directory) of applicant folders, streamed as JSON Lines"""
+    if manifest is not None:
+        stored = await save_upload(manifest, BATCH_UPLOAD_DIR, MAX_BATCH_BYTES)
+        source, key = stored.path, stored.sha256
+    elif manifestPath:
+        root = os.path.realpath(BATCH_MANIFEST_DIR)
+        source = os.path.realpath(os.path.join(root, manifestPath))
+        if os.path.commonpath([root, source]) != root or not os.path.exists(source):
+            raise HTTPException(status_code=404, detail="Manifest not found")
+        key = hashlib.sha256(source.encode()).hexdigest()
+    else:
+        raise HTTPException(status_code=400, detail="Send a manifest zip or a manifestPath")
+    
+    # Same manifest -> same output file, so a re-post resumes where the last run stopped
+    filename = f"batch-{key[:16]}.jsonl"
+    print(f"Batch extraction: {source} -> {filename}")
+    
+    output_path = os.path.join(BATCH_OUTPUT_DIR, filename)
+    if os.path.exists(output_path):
+        # A resumed checkpoint counts as fresh, so retention never ages it out mid-run
+        os.utime(output_path)
+        retention_manager.track(output_path)
+    
+    def lines():
+        for record in run_batch(source, output_path, resume=resume):
+            if 'summary' in record:
+                record['summary']['output'] = filename
+                retention_manager.track(output_path)
+            yield json.dumps(record) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.post("/api/upload-form")
 async def upload_form(form: UploadFile = File(...)):
     try:
-        os.makedirs(os.path.join(UPLOAD_DIR, "forms"), exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, "forms", form.filename)
+        stored = await save_upload(form, os.path.join(UPLOAD_DIR, "forms"), MAX_FORM_BYTES)
         
-        with open(file_path, "wb") as f:
-            content = await form.read()
-            f.write(content)
+        print(f"Form uploaded: {form.filename} -> {stored.path}")
         
-        print(f"Form uploaded: {form.filename} -> {file_path}")
+        # Analysed once per field tree; known forms come straight from the registry
+        try:
+            template, cached = await run_in_threadpool(template_registry.analyze, stored.path, stored.sha256)
+        except Exception as e:
+            print(f"Form analysis failed for {stored.path}: {e}")
+            template, cached = None, False
         
         return {
             "success": True,
             "formFile": form.filename,
-            "formPath": file_path,
-            "fields": []
+            "formPath": stored.path,
+            "sha256": stored.sha256,
+            "fingerprint": template.fingerprint if template else None,
+            "pageCount": template.page_count if template else None,
+            "fillable": template.fillable if template else False,
+            "templateCached": cached,
+            "fields": template.describe() if template else []
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in upload_form: {e}")
         traceback.print_exc()
@@ -143,21 +267,51 @@ async def fill_pdf_endpoint(request: FillRequest):
         print(f"\nFilling PDF form: {request.formPath}")
         print(f"Data fields: {len(request.data)}")
         
-        output_path = await fill_pdf(request.formPath, request.data)
-        filename = os.path.basename(output_path)
+        if request.inline:
+            pdf = await run_in_threadpool(render_pdf, request.formPath, request.data)
+            return bytes_response(pdf, "filled.pdf")
         
-        print(f"PDF filled successfully: {output_path}")
+        output = await fill_pdf(request.formPath, request.data)
+        
+        print(f"PDF filled successfully: {output.path}")
         
         return {
             "success": True,
-            "outputPath": output_path,
-            "downloadUrl": f"http://localhost:{PORT}/api/download/{filename}"
+            "outputPath": output.path,
+            "output": output.to_dict(),
+            "downloadUrl": f"http://localhost:{PORT}/api/download/{output.filename}"
         }
     except Exception as e:
         print(f"Error in fill_pdf: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/fill-pdf/bulk")
+async def fill_pdf_bulk(
+    formPath: str = Form(...),
+    records: UploadFile = File(...),
+    output: str = Form("zip"),
+    nameField: Optional[str] = Form(None)
+):
+    """Fill one template for every CSV / JSON Lines record; streams a zip or one concatenated PDF"""
+    if not os.path.exists(formPath):
+        raise HTTPException(status_code=404, detail="Form not found")
+    if output not in ("zip", "pdf"):
+        raise HTTPException(status_code=400, detail="output must be 'zip' or 'pdf'")
+    fmt = "csv" if (records.filename or "").lower().endswith(".csv") else "jsonl"
+    print(f"Bulk fill: {formPath} x {records.filename} -> {output}")
+    
+    # Sync generators run in the threadpool; records are parsed as the workers take them
+    rows = read_records(io.TextIOWrapper(records.file, encoding="utf-8-sig", newline=""), fmt)
+    stats = MergeStats()
+    if output == "pdf":
+        chunks, media_type = merge_pdf(formPath, rows, stats), "application/pdf"
+    else:
+        chunks, media_type = merge_zip(formPath, rows, stats, nameField), "application/zip"
+    filename = f"merged_{time.strftime('%Y%m%d_%H%M%S')}.{output}"
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @app.post("/api/fill-url")
 async def fill_url_endpoint(request: URLFillRequest):
     try:
@@ -170,7 +324,9 @@ async def fill_url_endpoint(request: URLFillRequest):
             print(f"URL form filled: {result['message']}")
             return {
                 "success": True,
-                "message": result['message']
+                "message": result['message'],
+                "failedFields": result['failed_fields'],
+                "review": result['review']
             }
         else:
             print(f"URL form filling failed: {result['message']}")
@@ -180,6 +336,34 @@ async def fill_url_endpoint(request: URLFillRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/reviews/{review_id}")
+def get_review(review_id: str):
+    session = review_manager.get(review_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Review session not found or expired")
+    return {"success": True, **session.to_dict()}
+
+@app.get("/api/reviews/{review_id}/screenshot")
+def get_review_screenshot(review_id: str):
+    session = review_manager.get(review_id)
+    if not session or not session.screenshot_path:
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+    return FileResponse(session.screenshot_path, media_type="image/png")
+
+@app.get("/api/reviews/{review_id}/storage-state")
+def get_review_storage_state(review_id: str):
+    """Playwright storage state; load with browser.new_context(storage_state=...) to resume"""
+    session = review_manager.get(review_id)
+    if not session or not session.storage_state_path:
+        raise HTTPException(status_code=404, detail="Storage state not found")
+    return FileResponse(session.storage_state_path, media_type="application/json")
+
+@app.delete("/api/reviews/{review_id}")
+def close_review(review_id: str):
+    if not review_manager.close(review_id):
+        raise HTTPException(status_code=404, detail="Review session not found")
+    return {"success": True}
+
 @app.get("/api/sample-forms")
 def get_sample_forms():
     try:
@@ -202,16 +386,8 @@ def get_sample_forms():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/download/{filename}")
-def download_file(filename: str):
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    
-    if not os.path.exists(file_path):
-        print(f"File not found: {file_path}")
-        raise HTTPException(status_code=404, detail="File not found")
+def download_file(filename: str, request: Request):
+    file_path = output_store.path(filename)
     
     print(f"Downloading file: {file_path}")
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type='application/pdf'
-    )
\ No newline at end of file
+    return file_response(request, file_path, filename)
\ No newline at end of file
@@ -17,6 +17,7 @@ class ExtractedData(BaseModel):
 class FillRequest(BaseModel):
     formPath: str
     data: Dict[str, str]
+    inline: bool = False  # Stream the PDF back instead of storing it for download
 
 class URLFillRequest(BaseModel):
     url: str
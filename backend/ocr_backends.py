@@ -0,0 +1,93 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from config import OCR_BACKEND, OCR_LANG
+
+try:
+    import tesserocr
+except ImportError:  # Optional: pip install tesserocr
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+
+class PytesseractBackend:
+    """Spawns a tesseract process per call (always available)"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        self.lang = lang
+
+    def image_to_string(self, image, oem: int, psm: int) -> str:
+        return pytesseract.image_to_string(image, config=f'--oem {oem} --psm {psm}', lang=self.lang)
+
+
+class TesserocrBackend:
+    """Resident in-process engines via the tesseract C API.
+
+    Each OCR worker thread keeps one initialised engine per OEM, so
+    traineddata is loaded once per thread instead of once per call, and
+    images are handed over as in-memory buffers with no temp files. An OEM
+    whose engine cannot start is served by pytesseract instead.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG):
+        self.lang = lang
+        self._local = threading.local()
+        self._fallback = PytesseractBackend(lang)
+
+    def _engine(self, oem: int):
+        engines: Dict[int, Optional[object]] = getattr(self._local, "engines", None)
+        if engines is None:
+            engines = self._local.engines = {}
+        if oem not in engines:
+            try:
+                # OEM and PSM values are plain ints; tesserocr.OEM/PSM only name them
+                engines[oem] = tesserocr.PyTessBaseAPI(lang=self.lang, oem=oem)
+            except Exception as e:
+                # e.g. OEM 0/2 without legacy traineddata; don't retry on every call
+                logger.error(f"❌ tesserocr cannot start OEM {oem} ({e}); using pytesseract for it")
+                engines[oem] = None
+        return engines[oem]
+
+    def image_to_string(self, image, oem: int, psm: int) -> str:
+        engine = self._engine(oem)
+        if engine is None:
+            return self._fallback.image_to_string(image, oem, psm)
+        engine.SetPageSegMode(psm)
+        if isinstance(image, np.ndarray):
+            image = np.ascontiguousarray(image)
+            height, width = image.shape[:2]
+            channels = 1 if image.ndim == 2 else image.shape[2]
+            engine.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        else:
+            engine.SetImage(image if isinstance(image, Image.Image) else Image.open(image))
+        return engine.GetUTF8Text()
+
+
+def create_ocr_backend(name: str = OCR_BACKEND):
+    """'tesserocr', 'pytesseract', or 'auto' (tesserocr when installed)"""
+    if name in ("auto", "tesserocr") and tesserocr is not None:
+        return TesserocrBackend()
+    if name == "tesserocr":
+        logger.warning("⚠️  tesserocr not installed, falling back to pytesseract")
+    return PytesseractBackend()
+
+
+_backend = None
+
+def get_ocr_backend():
+    """Process-wide OCR backend, created on first use"""
+    global _backend
+    if _backend is None:
+        _backend = create_ocr_backend()
+        logger.info(f"🔧 OCR backend: {_backend.name}")
+    return _backend
@@ -0,0 +1,83 @@
+import hashlib
+import threading
+from typing import Dict, List, Set, Tuple
+
+from config import OCR_DEDUP_SIMILARITY, OCR_DEDUP_SHINGLE_SIZE
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def _shingles(normalized: str, size: int) -> Set[int]:
+    # Character shingles: a single OCR misread only disturbs `size` of them
+    if len(normalized) <= size:
+        return {hash(normalized)}
+    return {hash(normalized[i:i + size]) for i in range(len(normalized) - size + 1)}
+
+
+class TextDeduplicator:
+    """Collapses identical and near-identical OCR outputs within one document.
+
+    Exact duplicates are found by hashing whitespace/case-normalized text.
+    Near duplicates are found by Jaccard similarity of character shingles against
+    the texts kept so far.
+    """
+
+    def __init__(self, threshold: float = OCR_DEDUP_SIMILARITY, shingle_size: int = OCR_DEDUP_SHINGLE_SIZE):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.texts: List[str] = []
+        self._hashes: Dict[str, int] = {}
+        self._shingles: List[Set[int]] = []
+
+    def add(self, text: str) -> Tuple[int, str]:
+        """Returns (index of the representative text, 'unique' | 'exact' | 'near')"""
+        normalized = _normalize(text)
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        if digest in self._hashes:
+            return self._hashes[digest], 'exact'
+
+        shingles = _shingles(normalized, self.shingle_size)
+        for index, existing in enumerate(self._shingles):
+            union = len(shingles | existing)
+            if union and len(shingles & existing) / union >= self.threshold:
+                self._hashes[digest] = index
+                return index, 'near'
+
+        index = len(self.texts)
+        self.texts.append(text)
+        self._shingles.append(shingles)
+        self._hashes[digest] = index
+        return index, 'unique'
+
+
+class DedupStats:
+    """Per-variant redundancy counters, used to prune variants that never add text"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.variants: Dict[str, Dict[str, int]] = {}
+
+    def record(self, variant: str, kind: str):
+        with self._lock:
+            entry = self.variants.setdefault(variant, {'texts': 0, 'unique': 0, 'exact': 0, 'near': 0})
+            entry['texts'] += 1
+            entry[kind] += 1
+
+    def snapshot(self, min_texts: int = 10) -> Dict:
+        with self._lock:
+            total = sum(v['texts'] for v in self.variants.values())
+            unique = sum(v['unique'] for v in self.variants.values())
+            return {
+                'texts': total,
+                'unique': unique,
+                'redundant': total - unique,
+                'redundant_rate': round((total - unique) / total, 4) if total else 0.0,
+                'variants': {name: dict(v) for name, v in self.variants.items()},
+                'never_unique': sorted(name for name, v in self.variants.items()
+                                       if v['texts'] >= min_texts and v['unique'] == 0),
+            }
+
+
+dedup_stats = DedupStats()
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, IO, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from config import OUTPUT_DIR, UPLOAD_CHUNK_SIZE
+from retention import retention_manager
+
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@dataclass
+class StoredOutput:
+    """A generated file, named by a random id so concurrent fills never collide"""
+    id: str
+    filename: str
+    path: str
+    sha256: str
+    size: int
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "filename": self.filename, "sha256": self.sha256, "size": self.size}
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts what is written (PdfWriter also needs tell())"""
+
+    def __init__(self, f: IO[bytes]):
+        self._f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self._f.write(data)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def flush(self):
+        self._f.flush()
+
+
+class OutputStore:
+    """Filled PDFs under OUTPUT_DIR.
+
+    Every output is written to a temp file in the same directory, hashed on
+    the way, and renamed into place, so a download never sees a half-written
+    file and two fills in the same second get different names.
+    """
+
+    def __init__(self, directory: str = OUTPUT_DIR):
+        self.directory = directory
+
+    def save(self, write: Callable[[IO[bytes]], object], prefix: str = "filled", ext: str = ".pdf") -> StoredOutput:
+        """Call write(stream) and publish what it wrote as <prefix>_<id><ext>"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".output-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                out = _HashingWriter(f)
+                write(out)
+            output_id = uuid.uuid4().hex
+            filename = f"{prefix}_{output_id}{ext}"
+            path = os.path.join(self.directory, filename)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        retention_manager.track(path, out.size)
+        return StoredOutput(id=output_id, filename=filename, path=path,
+                            sha256=out.digest.hexdigest(), size=out.size)
+
+    def path(self, filename: str) -> str:
+        """Resolve a download name; anything that is not a plain file name in the store is a 404"""
+        path = os.path.join(self.directory, filename)
+        if not _SAFE_NAME.match(filename) or not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="File not found")
+        return path
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """A single 'bytes=' range as (start, end inclusive); None means send the whole file"""
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None  # Absent, multi-range or malformed: a full 200 is a valid answer
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1  # Suffix: the last n bytes
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _read_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(UPLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request: Request, path: str, filename: str, media_type: str = "application/pdf") -> StreamingResponse:
+    """Stream a stored file in chunks, honouring a single Range request (resumed and partial downloads)"""
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    byte_range = None
+    if request.headers.get("if-range", etag) == etag:  # A stale If-Range gets the whole file
+        byte_range = _parse_range(request.headers.get("range"), stat.st_size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(stat.st_size)
+        return StreamingResponse(_read_file(path, 0, stat.st_size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_read_file(path, start, end - start + 1), status_code=206,
+                             media_type=media_type, headers=headers)
+
+
+def bytes_response(data: bytes, filename: str, media_type: str = "application/pdf") -> StreamingResponse:
+    """Stream an in-memory body in chunks without writing it to disk"""
+    def chunks():
+        view = memoryview(data)
+        for offset in range(0, len(view), UPLOAD_CHUNK_SIZE):
+            yield bytes(view[offset:offset + UPLOAD_CHUNK_SIZE])
+
+    return StreamingResponse(chunks(), media_type=media_type, headers={
+        "Content-Length": str(len(data)),
+        "Content-Disposition": f'inline; filename="{filename}"',
+        "X-Content-SHA256": hashlib.sha256(data).hexdigest(),
+    })
+
+
+output_store = OutputStore()
@@ -0,0 +1,161 @@
+"""
+Precompiled regex registry for UniversalIDExtractor.
+
+Every pattern is compiled once at import and stored in tuples or read-only
+mappings, so a single extractor instance can be shared across threads.
+"""
+import re
+from types import MappingProxyType
+
+
+def _compile_all(patterns, flags=0):
+    return tuple(re.compile(p, flags) for p in patterns)
+
+
+def _compile_scored(patterns, flags=0):
+    return tuple((re.compile(p, flags), confidence) for p, confidence in patterns)
+
+
+WHITESPACE = re.compile(r'\s+')
+NEWLINES = re.compile(r'\n+')
+NON_DIGIT = re.compile(r'[^\d]')
+SIX_DIGITS = re.compile(r'\d{6}')
+
+# Document type detection
+DOC_PATTERNS = MappingProxyType({
+    'aadhaar': _compile_all([
+        r'(?i)aadhaar',
+        r'(?i)unique\s+identification',
+        r'(?i)UIDAI',
+        r'\d{4}\s?\d{4}\s?\d{4}',
+        r'\d{4}/\d{5}/\d{5}'
+    ], re.IGNORECASE),
+    'pan': _compile_all([
+        r'(?i)permanent\s+account',
+        r'(?i)income\s+tax',
+        r'(?i)PAN',
+        r'\b[A-Z]{5}\d{4}[A-Z]\b'
+    ], re.IGNORECASE),
+    'driving_license': _compile_all([
+        r'(?i)driving\s+licence',
+        r'(?i)motor\s+vehicle',
+        r'(?i)transport',
+        r'(?i)authorization\s+to\s+drive',
+        r'DL\s*(?:No|Number)',
+        r'\b[A-Z]{2}\d{2}\s?\d{11}\b'
+    ], re.IGNORECASE),
+    'voter_id': _compile_all([
+        r'(?i)election\s+commission',
+        r'(?i)voter',
+        r'(?i)EPIC',
+        r'Elector\s*(?:\'s)?\s*Photo',
+        r'\b[A-Z]{3}\d{7}\b'
+    ], re.IGNORECASE),
+    'passport': _compile_all([
+        r'(?i)passport',
+        r'(?i)republic\s+of\s+india',
+        r'(?i)ministry\s+of\s+external',
+        r'\b[A-Z]\d{7}\b'
+    ], re.IGNORECASE),
+})
+
+# Names: document-specific patterns are tried before the universal ones
+NAME_PATTERNS = MappingProxyType({
+    'pan': _compile_scored([
+        (r'(?:Name|NAME)\s*[:\n]\s*([A-Z][A-Za-z\s]{3,50}?)(?=\n|Date of Birth|Father)', 0.98),
+        (r'(?:Name|NAME)\s+([A-Z][A-Z\s]{3,50}?)(?=\n|\s{2,})', 0.95),
+    ], re.MULTILINE),
+    'driving_license': _compile_scored([
+        (r'(?:Name|NAME|Holder)[:\s]+([A-Z][A-Za-z\s]{3,50}?)(?=\n|S/O|D/O|DOB|Address)', 0.98),
+        (r'(?:Name|NAME)\s*[:\n]\s*([A-Z][A-Za-z\s]{3,50}?)(?=\n)', 0.95),
+    ], re.MULTILINE),
+    'aadhaar': _compile_scored([
+        (r'To[\s\n:]+([A-Z][a-z]{2,15}(?:\s+[A-Z](?:\s+[A-Z])?)?(?:\s+[A-Z][a-z]{2,15})?)', 0.98),
+        (r'\b([A-Z][a-z]{3,15}\s+[A-Z]\s+[A-Z])\b', 0.95),
+    ], re.MULTILINE),
+    'default': _compile_scored([
+        (r'(?:Name|NAME|To|TO)[:\s\n]+([A-Z][A-Za-z\s]{3,50}?)(?=\n|S/O|D/O|Father|Mother|DOB|Address|\d)', 0.95),
+    ], re.MULTILINE),
+})
+
+NAME_PATTERNS_UNIVERSAL = _compile_scored([
+    (r'(?:To|Name|NAME)[:\s]+([A-Z][A-Za-z\s]{3,50}?)(?=\n|$|[,.]|\s+(?:S/O|D/O|Father))', 0.92),
+    (r'\b([A-Z][a-z]{2,15}(?:\s+[A-Z][a-z]{2,15}){1,3})\b', 0.80),
+    (r'\b([A-Z][a-z]{3,15}\s+[A-Z](?:\s+[A-Z])?)\b', 0.85),
+    (r'\b([A-Z]{3,15}(?:\s+[A-Z]{3,15}){1,3})\b', 0.75),
+    (r'(?:Card|CARD|License|LICENSE)[\s\n]{1,20}([A-Z][A-Za-z\s]{5,50}?)(?=\n|Father|Address|S/O|D/O)', 0.85),
+], re.MULTILINE)
+
+NAME_LINE = re.compile(r'^[A-Z][A-Za-z\s]{5,60}$')
+NAME_PART = re.compile(r'^[A-Za-z.]+$')
+
+# Addresses: document-specific patterns are tried before the universal ones
+ADDRESS_PATTERNS = MappingProxyType({
+    'pan': _compile_scored([
+        (r'(?:Address|ADDRESS)[:\s]+((?:.*?(?:\n.*?){1,5}?)?\d{6})', 0.95),
+        (r'(?:Flat|House|Plot|Door)[^\n]*(?:\n[^\n]+){1,4}\d{6}', 0.90),
+    ], re.IGNORECASE | re.DOTALL),
+    'driving_license': _compile_scored([
+        (r'(?:Address|ADDRESS)[:\s]+((?:.*?(?:\n.*?){1,6}?)?\d{6})', 0.95),
+        (r'(?:House|Door|Flat|No)[^\n]*(?:\n[^\n]+){1,5}\d{6}', 0.90),
+    ], re.IGNORECASE | re.DOTALL),
+    'default': _compile_scored([
+        (r'((?:NO|No|D\.?No|H\.?No)[:\s]*\d+[/\-,]?\d*[^\n]*?(?:NAGAR|Nagar|POST|Post|Road|ROAD|Street|STREET|Patti|Village|Dist|District)[^\n]*?\d{6})', 0.98),
+        (r'((?:NO|No|D\.?No)[:\s]*\d+[/\-]?\d*[^\n]*(?:\n[^\n]+){1,6}?\d{6})', 0.95),
+    ], re.IGNORECASE | re.DOTALL),
+})
+
+ADDRESS_PATTERNS_UNIVERSAL = _compile_scored([
+    (r'(?:Address|ADDRESS)[:\s]+(.*?\d{6})', 0.88),
+    (r'([^\n]*(?:Nagar|Post|Road|Street|District|Dist|Village|City)[^\n]*\d{6})', 0.80),
+], re.IGNORECASE | re.DOTALL)
+
+ADDRESS_LINE_START = re.compile(r'(?:Address|ADDRESS|NO|No|D\.?No|House|Flat)', re.IGNORECASE)
+
+# ID numbers
+AADHAAR_PATTERNS = _compile_all([
+    r'\b(\d{4}\s?\d{4}\s?\d{4})\b',
+    r'(?:Aadhaar|AADHAAR|UID)[:\s]*(\d{4}\s?\d{4}\s?\d{4})',
+])
+ENROLLMENT = re.compile(r'(\d{4}[/]\d{5}[/]\d{5})')
+PAN_PATTERNS = _compile_all([
+    r'\b([A-Z]{5}\d{4}[A-Z])\b',
+    r'(?:PAN|Permanent Account)[^\n]*\n\s*([A-Z]{5}\d{4}[A-Z])',
+])
+PAN_STRICT = re.compile(r'^[A-Z]{3}[ABCFGHLJPTF][A-Z]\d{4}[A-Z]$')
+DL_PATTERNS = _compile_all([
+    r'\b([A-Z]{2}[-\s]?\d{2}[-\s]?\d{11})\b',
+    r'\b([A-Z]{2}\d{13,14})\b',
+    r'(?:DL|License|Licence)\s*(?:No|Number|#)?[:\s]*([A-Z]{2}[-\s]?\d{13,15})',
+])
+VOTER_PATTERNS = _compile_all([
+    r'\b([A-Z]{3}\d{7})\b',
+    r'(?:EPIC|Elector|Voter)[^\n]*\n\s*([A-Z]{3}\d{7})',
+])
+PASSPORT_PATTERNS = _compile_all([
+    r'\b([A-Z]\d{7})\b',
+    r'(?:Passport|Pass Port)[^\n]*\n\s*([A-Z]\d{7})',
+])
+
+# Other fields
+FATHER_PATTERNS = _compile_scored([
+    (r'(?:S/O|s/o|Son of|SON OF)[:\s]+([A-Z][A-Za-z\s]{3,40}?)(?=\n|,|Address|DOB|\d)', 0.95),
+    (r'(?:D/O|d/o|Daughter of|DAUGHTER OF)[:\s]+([A-Z][A-Za-z\s]{3,40}?)(?=\n|,|Address|DOB|\d)', 0.95),
+    (r'(?:Father|FATHER)[:\s\']+s?\s*(?:Name)?[:\s]*([A-Z][A-Za-z\s]{3,40}?)(?=\n|,|Mother)', 0.90),
+], re.IGNORECASE)
+
+PHONE_PATTERNS = _compile_all([
+    r'(?:Phone|Mobile|Mob|Contact|Tel|Cell)[:\s]*([6-9]\d{9})',
+    r'\+91[\s-]?([6-9]\d{9})',
+    r'\b([6-9]\d{9})\b',
+    r'(\d{5}[\s-]?\d{5})',
+])
+
+PINCODE = re.compile(r'\b([1-9]\d{5})\b')
+DOB_PATTERNS = _compile_all([
+    r'(?:DOB|Date of Birth|Birth|D\.O\.B)[:\s]*(\d{2}[/-]\d{2}[/-]\d{4})',
+    r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b',
+], re.IGNORECASE)
+GENDER_FEMALE = re.compile(r'\b(Female|FEMALE|F)\b')
+GENDER_MALE = re.compile(r'\b(Male|MALE|M)\b')
+EMAIL = re.compile(r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b')
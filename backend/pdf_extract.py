@@ -0,0 +1,150 @@
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+from PyPDF2 import PdfReader
+
+from config import (PDF_OCR_DPI, PDF_TEXT_MIN_CHARS, PDF_TEXT_BACKEND, PDF_TEXT_PROCESSES,
+                    PDF_TEXT_BATCH_PAGES, PDF_PARALLEL_MIN_PAGES)
+
+try:
+    import fitz  # PyMuPDF: faster text layer, and rasterizes scanned pages
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PdfPageText:
+    """Text layer of one page, with timing and any extraction error"""
+    index: int
+    text: str
+    seconds: float
+    error: str = ""
+
+
+class PyPDF2TextBackend:
+    name = "pypdf2"
+
+    def page_count(self, file_path: str) -> int:
+        return len(PdfReader(file_path).pages)
+
+    def extract_range(self, file_path: str, start: int, stop: int) -> List[PdfPageText]:
+        reader = PdfReader(file_path)
+        return [_timed_page(index, lambda: reader.pages[index].extract_text()) for index in range(start, stop)]
+
+
+class PyMuPDFTextBackend:
+    name = "pymupdf"
+
+    def page_count(self, file_path: str) -> int:
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+
+    def extract_range(self, file_path: str, start: int, stop: int) -> List[PdfPageText]:
+        with fitz.open(file_path) as doc:
+            return [_timed_page(index, lambda: doc[index].get_text()) for index in range(start, stop)]
+
+
+PDF_TEXT_BACKENDS = {"pypdf2": PyPDF2TextBackend, "pymupdf": PyMuPDFTextBackend}
+
+
+def get_pdf_text_backend(name: str = PDF_TEXT_BACKEND):
+    """'pymupdf', 'pypdf2', or 'auto' (PyMuPDF when installed)"""
+    if name == "auto":
+        name = "pymupdf" if fitz is not None else "pypdf2"
+    if name == "pymupdf" and fitz is None:
+        logger.warning("⚠️  PyMuPDF not installed, falling back to PyPDF2 for text extraction")
+        name = "pypdf2"
+    return PDF_TEXT_BACKENDS[name]()
+
+
+def _timed_page(index: int, extract: Callable[[], Optional[str]]) -> PdfPageText:
+    start = time.perf_counter()
+    try:
+        return PdfPageText(index, extract() or "", time.perf_counter() - start)
+    except Exception as e:
+        return PdfPageText(index, "", time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+
+def _extract_range(backend_name: str, file_path: str, start: int, stop: int) -> List[PdfPageText]:
+    """Process-pool entry point: each worker opens the PDF itself"""
+    return PDF_TEXT_BACKENDS[backend_name]().extract_range(file_path, start, stop)
+
+
+# Text-layer parsing is CPU-bound Python, so page ranges go to processes, not threads.
+# Spawned rather than forked: the server process is full of threads holding locks.
+_text_pool = None
+
+def _get_text_pool() -> ProcessPoolExecutor:
+    global _text_pool
+    if _text_pool is None:
+        _text_pool = ProcessPoolExecutor(max_workers=PDF_TEXT_PROCESSES,
+                                         mp_context=multiprocessing.get_context("spawn"))
+    return _text_pool
+
+
+def read_pdf_pages(file_path: str, stop: Optional[Callable[[List[PdfPageText]], bool]] = None) -> List[PdfPageText]:
+    """Text layer of every page, in order.
+
+    Pages are read in batches of PDF_TEXT_BATCH_PAGES; large documents split
+    each batch into page ranges extracted in parallel. stop, if given, sees
+    each finished batch and can end the read early (e.g. once the required
+    fields are found). Pages that fail carry the error instead of raising.
+    """
+    backend = get_pdf_text_backend()
+    page_count = backend.page_count(file_path)
+    parallel = PDF_TEXT_PROCESSES > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+    pages: List[PdfPageText] = []
+
+    for batch_start in range(0, page_count, PDF_TEXT_BATCH_PAGES):
+        batch_stop = min(batch_start + PDF_TEXT_BATCH_PAGES, page_count)
+        if parallel:
+            step = math.ceil((batch_stop - batch_start) / PDF_TEXT_PROCESSES)
+            futures = [
+                _get_text_pool().submit(_extract_range, backend.name, file_path, start, min(start + step, batch_stop))
+                for start in range(batch_start, batch_stop, step)
+            ]
+            batch = [page for future in futures for page in future.result()]
+        else:
+            batch = backend.extract_range(file_path, batch_start, batch_stop)
+        pages.extend(batch)
+
+        if stop and batch_stop < page_count and stop(batch):
+            logger.info(f"🛑 Required fields found after {batch_stop}/{page_count} pages - stopping early")
+            break
+
+    failed = [page for page in pages if page.error]
+    for page in failed:
+        logger.warning(f"⚠️  Page {page.index + 1}: text extraction failed: {page.error}")
+    logger.info(f"📄 {backend.name}: {len(pages)} page(s) in {sum(p.seconds for p in pages):.2f}s "
+                f"(slowest {max((p.seconds for p in pages), default=0):.2f}s, {len(failed)} failed)")
+    return pages
+
+
+def is_scanned(text: str) -> bool:
+    """A page with (almost) no text layer is treated as a scan"""
+    return len(text.strip()) < PDF_TEXT_MIN_CHARS
+
+
+def can_rasterize() -> bool:
+    return fitz is not None
+
+
+def render_page(file_path: str, index: int, dpi: int = PDF_OCR_DPI) -> np.ndarray:
+    """Rasterize one page to an RGB array.
+
+    The document is opened per call: PyMuPDF documents are not thread-safe,
+    and this keeps only the requested page decoded.
+    """
+    if fitz is None:
+        raise RuntimeError("PyMuPDF is required to OCR scanned PDF pages")
+    with fitz.open(file_path) as doc:
+        pix = doc[index].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3).copy()
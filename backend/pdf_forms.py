@@ -0,0 +1,320 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple, Union, IO
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, BooleanObject, DictionaryObject, NameObject, TextStringObject
+
+from config import FORM_TEMPLATE_CACHE_SIZE, TEMPLATE_REGISTRY_PATH
+from field_matcher import MATCHER_VERSION, match_fields
+
+FIELD_TYPES = {'/Tx': 'text', '/Ch': 'choice', '/Btn': 'button', '/Sig': 'signature'}
+FILLABLE_TYPES = {'text', 'choice'}
+
+
+@dataclass
+class FormField:
+    """One widget of an AcroForm field"""
+    name: str  # Fully qualified, e.g. 'applicant.name'
+    type: str  # text | choice | button | signature
+    page: int
+    rect: List[float]
+
+
+@dataclass
+class FormTemplate:
+    """A PDF form analysed once: its widgets and which data key fills each field"""
+    sha256: str
+    page_count: int
+    fields: List[FormField]
+    field_keys: Dict[str, str] = field(default_factory=dict)  # Field name -> ExtractedData key
+    field_scores: Dict[str, float] = field(default_factory=dict)
+    fingerprint: str = ""  # Hash of the field tree; re-saved copies of a form share it
+
+    @property
+    def fillable(self) -> bool:
+        return any(f.type in FILLABLE_TYPES for f in self.fields)
+
+    def describe(self) -> List[Dict]:
+        """Widgets with the data key each one is filled from, for API responses"""
+        return [{**asdict(f), "key": self.field_keys.get(f.name), "score": self.field_scores.get(f.name)}
+                for f in self.fields]
+
+    def page_values(self, data: Dict[str, str]) -> Dict[int, Dict[str, str]]:
+        """{page index: {field name: value}} for every field data has a value for"""
+        values = {}
+        for f in self.fields:
+            if f.type not in FILLABLE_TYPES:
+                continue
+            # A data key spelled exactly like the field wins over the matcher
+            value = data.get(f.name) or data.get(self.field_keys.get(f.name, ''))
+            if value:
+                values.setdefault(f.page, {})[f.name] = str(value)
+        return values
+
+
+def _qualified_name(annot) -> Optional[str]:
+    parts = []
+    node = annot
+    while node is not None:
+        if '/T' in node:
+            parts.append(str(node['/T']))
+        node = node.get('/Parent')
+        node = node.get_object() if node is not None else None
+    return '.'.join(reversed(parts)) or None
+
+
+def _field_type(annot) -> str:
+    node = annot
+    while node is not None:
+        if '/FT' in node:
+            return FIELD_TYPES.get(node['/FT'], 'unknown')
+        node = node.get('/Parent')
+        node = node.get_object() if node is not None else None
+    return 'unknown'
+
+
+def read_fields(reader: PdfReader) -> List[FormField]:
+    """Every page's widgets, in page order"""
+    fields = []
+    for page_index, page in enumerate(reader.pages):
+        for annot in page.get('/Annots', []):
+            annot = annot.get_object()
+            if annot.get('/Subtype') != '/Widget':
+                continue
+            name = _qualified_name(annot)
+            if name:
+                rect = [round(float(v), 2) for v in annot.get('/Rect', [])]
+                fields.append(FormField(name, _field_type(annot), page_index, rect))
+    return fields
+
+
+def fingerprint_fields(fields: List[FormField], page_count: int) -> str:
+    """Hash of the field tree: the same form re-saved or re-downloaded keeps it"""
+    tree = [page_count] + [[f.name, f.type, f.page, f.rect] for f in fields]
+    return hashlib.sha256(json.dumps(tree).encode()).hexdigest()
+
+
+def map_fields(template: FormTemplate) -> FormTemplate:
+    """Resolve the template's fillable field names to data keys"""
+    names = list(dict.fromkeys(f.name for f in template.fields if f.type in FILLABLE_TYPES))
+    # Match on the last name part: 'page1.applicant.fatherName' -> 'fatherName'.
+    # Multi-page forms repeat fields (Name, Applicant Name, Declarant Name): fill them all
+    matches = match_fields([(name.rsplit('.', 1)[-1], name) for name in names], unique_keys=False)
+    template.field_keys, template.field_scores = {}, {}
+    for name, match in zip(names, matches):
+        if match:
+            template.field_keys[name] = match.key
+            template.field_scores[name] = match.score
+    return template
+
+
+def analyze_template(source: Union[str, IO, PdfReader], sha256: str = "") -> FormTemplate:
+    """Walk every page's widgets once and resolve field names to data keys"""
+    reader = source if isinstance(source, PdfReader) else PdfReader(source)
+    fields = read_fields(reader)
+    return map_fields(FormTemplate(sha256=sha256, page_count=len(reader.pages), fields=fields,
+                                   fingerprint=fingerprint_fields(fields, len(reader.pages))))
+
+
+def _copy_acroform(reader: PdfReader, writer: PdfWriter):
+    """PdfWriter.append copies the widgets but not /AcroForm; rebuild it over the copies"""
+    fields, seen = ArrayObject(), set()
+    for page in writer.pages:
+        for ref in page.get('/Annots', []):
+            node = ref.get_object()
+            if node.get('/Subtype') != '/Widget':
+                continue
+            while '/Parent' in node:
+                ref = node.raw_get('/Parent')
+                node = ref.get_object()
+            if ref.idnum not in seen:
+                seen.add(ref.idnum)
+                fields.append(ref)
+
+    acroform = DictionaryObject({NameObject('/Fields'): fields,
+                                 NameObject('/NeedAppearances'): BooleanObject(True)})
+    source = reader.trailer['/Root'].get('/AcroForm')
+    if source is not None:
+        source = source.get_object()
+        for key in ('/DA', '/DR', '/Q'):
+            if key in source:
+                acroform[NameObject(key)] = source[key].clone(writer)
+    writer._root_object[NameObject('/AcroForm')] = writer._add_object(acroform)
+
+
+class PreparedForm:
+    """A template parsed once into a writer that is refilled and rewritten per record.
+
+    Only the /V of fields filled last time are reset, so a fill costs a dict
+    lookup per value plus serialization; nothing is re-parsed or cloned.
+    """
+
+    def __init__(self, template: FormTemplate, source: Union[str, IO, PdfReader]):
+        reader = source if isinstance(source, PdfReader) else PdfReader(source)
+        self.template = template
+        self.writer = PdfWriter()
+        self.writer.append(reader, excluded_fields=[])
+        _copy_acroform(reader, self.writer)
+
+        # Field name -> the dictionaries holding its value (the field, not its kid widgets)
+        self._targets: Dict[str, List[DictionaryObject]] = {}
+        for page in self.writer.pages:
+            for annot in page.get('/Annots', []):
+                annot = annot.get_object()
+                if annot.get('/Subtype') != '/Widget':
+                    continue
+                target = annot if '/T' in annot else annot['/Parent'].get_object()
+                holders = self._targets.setdefault(_qualified_name(annot) or '', [])
+                if not any(h is target for h in holders):
+                    holders.append(target)
+        self._original = {name: [h.get('/V') for h in holders] for name, holders in self._targets.items()}
+        self._dirty: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, data: Dict[str, str], out: IO) -> int:
+        """Write the form filled with data to out; returns the number of fields filled"""
+        with self._lock:
+            for name in self._dirty:
+                for holder, value in zip(self._targets[name], self._original[name]):
+                    if value is None:
+                        holder.pop('/V', None)
+                    else:
+                        holder[NameObject('/V')] = value
+            self._dirty = []
+
+            # One pass per page over just the fields that get a value
+            for values in self.template.page_values(data).values():
+                for name, value in values.items():
+                    for holder in self._targets.get(name, []):
+                        holder[NameObject('/V')] = TextStringObject(value)
+                    self._dirty.append(name)
+            self.writer.write(out)
+            return len(self._dirty)
+
+
+class TemplateRegistry:
+    """Form analyses kept across restarts, keyed by field-tree fingerprint.
+
+    A file seen before (same content hash) is answered without opening the
+    PDF. A new copy of a known form only has its widgets read: the mapping to
+    data keys is reused. Mappings made by an older matcher (MATCHER_VERSION)
+    are redone on first use.
+    """
+
+    def __init__(self, path: Optional[str] = TEMPLATE_REGISTRY_PATH):
+        self._lock = threading.Lock()
+        self.counters = {"file_hits": 0, "fingerprint_hits": 0, "misses": 0}
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS templates ("
+            "fingerprint TEXT PRIMARY KEY, analysis TEXT NOT NULL, matcher TEXT NOT NULL, "
+            "uses INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS files (sha256 TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)")
+        self._db.commit()
+
+    def analyze(self, source: Union[str, IO, PdfReader], sha256: str) -> Tuple[FormTemplate, bool]:
+        """The template for a form file; returns (template, whether a stored analysis was used)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT t.fingerprint, t.analysis, t.matcher FROM files f "
+                "JOIN templates t ON t.fingerprint = f.fingerprint WHERE f.sha256 = ?", (sha256,)
+            ).fetchone()
+        if row and row[2] == MATCHER_VERSION:
+            return self._used(row[0], row[1], sha256, "file_hits"), True
+
+        reader = source if isinstance(source, PdfReader) else PdfReader(source)
+        fields = read_fields(reader)
+        fingerprint = fingerprint_fields(fields, len(reader.pages))
+        with self._lock:
+            row = self._db.execute("SELECT analysis, matcher FROM templates WHERE fingerprint = ?",
+                                   (fingerprint,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO files (sha256, fingerprint) VALUES (?, ?)",
+                             (sha256, fingerprint))
+            self._db.commit()
+        if row and row[1] == MATCHER_VERSION:
+            return self._used(fingerprint, row[0], sha256, "fingerprint_hits"), True
+
+        template = map_fields(FormTemplate(sha256=sha256, page_count=len(reader.pages), fields=fields,
+                                           fingerprint=fingerprint))
+        analysis = json.dumps({"pageCount": template.page_count, "fields": [asdict(f) for f in fields],
+                               "fieldKeys": template.field_keys, "fieldScores": template.field_scores})
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO templates (fingerprint, analysis, matcher, uses, accessed) "
+                "VALUES (?, ?, ?, 1, ?)", (fingerprint, analysis, MATCHER_VERSION, time.time()))
+            self._db.commit()
+            self.counters["misses"] += 1
+        return template, False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            templates, files = self._db.execute(
+                "SELECT (SELECT COUNT(*) FROM templates), (SELECT COUNT(*) FROM files)").fetchone()
+            return dict(self.counters, templates=templates, files=files)
+
+    def _used(self, fingerprint: str, analysis: str, sha256: str, counter: str) -> FormTemplate:
+        with self._lock:
+            self._db.execute("UPDATE templates SET uses = uses + 1, accessed = ? WHERE fingerprint = ?",
+                             (time.time(), fingerprint))
+            self._db.commit()
+            self.counters[counter] += 1
+        stored = json.loads(analysis)
+        return FormTemplate(sha256=sha256, page_count=stored["pageCount"],
+                            fields=[FormField(**f) for f in stored["fields"]],
+                            field_keys=stored["fieldKeys"], field_scores=stored["fieldScores"],
+                            fingerprint=fingerprint)
+
+
+template_registry = TemplateRegistry()
+
+
+class TemplateCache:
+    """Prepared templates by file content hash (LRU)"""
+
+    def __init__(self, max_entries: int = FORM_TEMPLATE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, PreparedForm]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, form_path: str, sha256: Optional[str] = None) -> PreparedForm:
+        content = None
+        if not sha256:
+            with open(form_path, 'rb') as f:
+                content = f.read()  # Forms are capped at MAX_FORM_BYTES
+            sha256 = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            form = self._entries.get(sha256)
+            if form is not None:
+                self._entries.move_to_end(sha256)
+                self.hits += 1
+                return form
+            self.misses += 1
+
+        reader = PdfReader(io.BytesIO(content) if content is not None else form_path)
+        template, _ = template_registry.analyze(reader, sha256)
+        form = PreparedForm(template, reader)
+        with self._lock:
+            self._entries[sha256] = form
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return form
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+template_cache = TemplateCache()
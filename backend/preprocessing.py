@@ -0,0 +1,127 @@
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import OCR_ROI_ENABLED
+from roi import locate_document
+
+logger = logging.getLogger(__name__)
+
+CONTRAST_ALPHAS = [1.5, 2.0, 2.5]
+BINARY_THRESHOLDS = [100, 127, 150, 180]
+ADAPTIVE_BLOCK_SIZES = [11, 15, 21, 31, 41]
+CLAHE_CLIPS = [2.0, 3.0, 4.0]
+MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+
+
+class VariantPipeline:
+    """Lazy preprocessing variants for one image.
+
+    Variants are built only when asked for, as NumPy arrays tesseract can take
+    directly. The RGB and grayscale bases are decoded once and shared; the only
+    other arrays kept are intermediates that several variants derive from
+    (CLAHE and denoise outputs), so the expensive ones are never computed for
+    a document the cascade finishes early.
+    """
+
+    def __init__(self, rgb: np.ndarray):
+        self.rgb = rgb
+        self.gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        self._shared: Dict[str, np.ndarray] = {}
+        self._builders = self._variant_builders()
+        self.names: List[str] = list(self._builders)
+
+    @classmethod
+    def from_path(cls, image_path: str, roi: bool = OCR_ROI_ENABLED) -> Optional["VariantPipeline"]:
+        img = cv2.imread(image_path)
+        if img is not None:
+            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        else:
+            try:
+                # Formats OpenCV cannot decode still go through PIL
+                rgb = np.asarray(Image.open(image_path).convert("RGB"))
+            except Exception as e:
+                logger.error(f"❌ Could not load image {image_path}: {e}")
+                return None
+        return cls.from_array(rgb, roi)
+
+    @classmethod
+    def from_array(cls, rgb: np.ndarray, roi: bool = OCR_ROI_ENABLED) -> "VariantPipeline":
+        return cls(locate_document(rgb) if roi else rgb)
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Build one variant; None if it fails"""
+        try:
+            return self._builders[name]()
+        except Exception as e:
+            logger.warning(f"⚠️  Variant '{name}' failed: {e}")
+            return None
+
+    def iter(self, names: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, np.ndarray]]:
+        """Yield (name, array) for the requested variants, one at a time"""
+        for name in (self.names if names is None else names):
+            if name not in self._builders:
+                continue
+            array = self.get(name)
+            if array is not None:
+                yield name, array
+
+    def release(self):
+        """Drop shared intermediates once no more variants are needed"""
+        self._shared.clear()
+
+    def _shared_base(self, key: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+        if key not in self._shared:
+            self._shared[key] = build()
+        return self._shared[key]
+
+    def _clahe(self, clip: float) -> np.ndarray:
+        return self._shared_base(
+            f"clahe_{clip}",
+            lambda: cv2.createCLAHE(clipLimit=clip, tileGridSize=(8, 8)).apply(self.gray),
+        )
+
+    def _denoised(self) -> np.ndarray:
+        return self._shared_base("denoised", lambda: cv2.fastNlMeansDenoising(self.gray, None, 10, 7, 21))
+
+    def _variant_builders(self) -> Dict[str, Callable[[], np.ndarray]]:
+        gray = self.gray
+        otsu = lambda img: cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        builders: Dict[str, Callable[[], np.ndarray]] = {"original": lambda: self.rgb}
+
+        # High resolution if small
+        h, w = self.rgb.shape[:2]
+        if w < 1000 or h < 1000:
+            builders["upscaled"] = lambda: cv2.resize(self.rgb, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
+
+        for alpha in CONTRAST_ALPHAS:
+            builders[f"contrast_{alpha}"] = lambda a=alpha: cv2.convertScaleAbs(gray, alpha=a, beta=0)
+
+        builders["otsu"] = lambda: otsu(gray)
+
+        for value in BINARY_THRESHOLDS:
+            builders[f"thresh_{value}"] = lambda v=value: cv2.threshold(gray, v, 255, cv2.THRESH_BINARY)[1]
+
+        builders["thresh_inv"] = lambda: cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)[1]
+
+        for block_size in ADAPTIVE_BLOCK_SIZES:
+            builders[f"adaptive_{block_size}"] = lambda b=block_size: cv2.adaptiveThreshold(
+                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, b, 2)
+
+        for clip in CLAHE_CLIPS:
+            builders[f"clahe_{clip}"] = lambda c=clip: self._clahe(c)
+            builders[f"clahe_{clip}_otsu"] = lambda c=clip: otsu(self._clahe(c))
+
+        builders["denoised"] = self._denoised
+        builders["denoised_otsu"] = lambda: otsu(self._denoised())
+        builders["bilateral"] = lambda: cv2.bilateralFilter(gray, 9, 75, 75)
+        builders["morph_close"] = lambda: cv2.morphologyEx(gray, cv2.MORPH_CLOSE, MORPH_KERNEL)
+        builders["eroded"] = lambda: cv2.erode(gray, MORPH_KERNEL, iterations=1)
+        builders["dilated"] = lambda: cv2.dilate(gray, MORPH_KERNEL, iterations=1)
+        builders["sharpened"] = lambda: cv2.filter2D(gray, -1, SHARPEN_KERNEL)
+        builders["blur_otsu"] = lambda: otsu(cv2.GaussianBlur(gray, (5, 5), 0))
+        return builders
@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import RETENTION_RULES, RETENTION_SWEEP_INTERVAL
+
+
+@dataclass
+class TrackedFile:
+    path: str
+    size: int
+    mtime: float
+    owner: Optional[str] = None  # Job id while a job still needs the file
+    generation: int = 0
+
+
+@dataclass
+class RetentionArea:
+    """One directory with its own age limit and byte quota"""
+    directory: str
+    max_age: float
+    max_bytes: int
+    bytes: int = 0
+    files: int = 0
+    heap: List[Tuple[float, int, str]] = field(default_factory=list, repr=False)  # (mtime, generation, path)
+
+
+class RetentionManager:
+    """Deletes old files from the upload and output directories.
+
+    Every file the app writes is registered here (size, mtime, owner job) as
+    it is written, and each area keeps a heap ordered by mtime. A sweep pops
+    from the oldest end only: files past the area's age limit, then the
+    oldest files until the area is back under its byte quota. The directories
+    are listed once at startup to pick up files from a previous run, never
+    per sweep. Files whose owner job is still running are left alone.
+    """
+
+    def __init__(self, rules: Dict[str, Tuple[float, int]] = RETENTION_RULES):
+        self.areas = {os.path.normpath(d): RetentionArea(os.path.normpath(d), age, quota)
+                      for d, (age, quota) in rules.items()}
+        self.index: Dict[str, TrackedFile] = {}
+        self.in_use: Callable[[str], bool] = lambda owner: False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.reclaimed = {"age": {"files": 0, "bytes": 0}, "quota": {"files": 0, "bytes": 0}}
+        self.sweeps = 0
+        self.last_sweep_seconds = 0.0
+
+    def start(self, in_use: Optional[Callable[[str], bool]] = None, interval: float = RETENTION_SWEEP_INTERVAL):
+        if in_use is not None:
+            self.in_use = in_use
+        for area in self.areas.values():
+            self._scan(area)
+        self._sweeper = asyncio.create_task(self._sweep_forever(interval))
+
+    async def stop(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    def track(self, path: str, size: Optional[int] = None, owner: Optional[str] = None):
+        """Register a file just written (or rewritten) under one of the managed directories"""
+        area = self.areas.get(os.path.dirname(os.path.normpath(path)))
+        if area is None:
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._add(area, os.path.normpath(path), stat.st_size if size is None else size, stat.st_mtime, owner)
+
+    def claim(self, path: str, owner: str):
+        """Mark a tracked file as needed by a job"""
+        with self._lock:
+            entry = self.index.get(os.path.normpath(path))
+            if entry is not None:
+                entry.owner = owner
+
+    def sweep(self, now: Optional[float] = None):
+        start = time.perf_counter()
+        now = time.time() if now is None else now
+        with self._lock:
+            for area in self.areas.values():
+                self._evict(area, now)
+            self.sweeps += 1
+        self.last_sweep_seconds = time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "areas": {
+                    area.directory: {"files": area.files, "bytes": area.bytes,
+                                     "maxAge": area.max_age, "maxBytes": area.max_bytes}
+                    for area in self.areas.values()
+                },
+                "reclaimed": {reason: dict(counts) for reason, counts in self.reclaimed.items()},
+                "sweeps": self.sweeps,
+                "lastSweepSeconds": round(self.last_sweep_seconds, 4),
+            }
+
+    def _scan(self, area: RetentionArea):
+        os.makedirs(area.directory, exist_ok=True)
+        with os.scandir(area.directory) as entries, self._lock:
+            for entry in entries:
+                # Dotfiles are in-flight temp files; subdirectories have their own owners
+                if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat()
+                self._add(area, os.path.normpath(entry.path), stat.st_size, stat.st_mtime, None)
+
+    def _add(self, area: RetentionArea, path: str, size: int, mtime: float, owner: Optional[str]):
+        old = self.index.get(path)
+        if old is not None:
+            # Content-addressed uploads land on the same path again; the old heap entry goes stale
+            area.bytes -= old.size
+            area.files -= 1
+            owner = owner or old.owner
+        self._generation += 1
+        self.index[path] = TrackedFile(path, size, mtime, owner, self._generation)
+        heapq.heappush(area.heap, (mtime, self._generation, path))
+        area.bytes += size
+        area.files += 1
+
+    def _evict(self, area: RetentionArea, now: float):
+        cutoff = now - area.max_age
+        skipped = []
+        while area.heap:
+            mtime, generation, path = area.heap[0]
+            entry = self.index.get(path)
+            if entry is None or entry.generation != generation:
+                heapq.heappop(area.heap)  # Stale: rewritten or already removed
+                continue
+            if mtime < cutoff:
+                reason = "age"
+            elif area.bytes > area.max_bytes:
+                reason = "quota"
+            else:
+                break
+            heapq.heappop(area.heap)
+            if entry.owner and self.in_use(entry.owner):
+                skipped.append((mtime, generation, path))
+                continue
+            self._remove(area, entry, reason)
+        for item in skipped:
+            heapq.heappush(area.heap, item)
+
+    def _remove(self, area: RetentionArea, entry: TrackedFile, reason: str):
+        try:
+            os.remove(entry.path)
+            self.reclaimed[reason]["files"] += 1
+            self.reclaimed[reason]["bytes"] += entry.size
+            print(f"🗑️ Deleted old file ({reason}): {entry.path}")
+        except FileNotFoundError:
+            pass  # Deleted by hand; just forget it
+        except OSError as e:
+            print(f"Retention: could not delete {entry.path}: {e}")
+        del self.index[entry.path]
+        area.bytes -= entry.size
+        area.files -= 1
+
+    async def _sweep_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                print(f"Retention sweep failed: {e}")
+
+
+retention_manager = RetentionManager()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config import REVIEW_DIR, REVIEW_TTL, REVIEW_KEEP_LIVE, REVIEW_MAX_LIVE
+from browser_pool import browser_pool
+
+
+@dataclass
+class ReviewSession:
+    """A filled web form waiting for a human to check and submit it"""
+    id: str
+    url: str
+    filled_count: int
+    failed_fields: List[str]
+    screenshot_path: str = ""
+    storage_state_path: str = ""
+    created_at: float = field(default_factory=time.time)
+    expires_at: float = 0.0
+    context: Optional[object] = field(default=None, repr=False)  # Live BrowserContext (headful only)
+
+    @property
+    def live(self) -> bool:
+        return self.context is not None
+
+    def to_dict(self) -> Dict:
+        base = f"/api/reviews/{self.id}"
+        return {
+            "reviewId": self.id,
+            "url": self.url,
+            "filledCount": self.filled_count,
+            "failedFields": self.failed_fields,
+            "live": self.live,
+            "screenshotUrl": f"{base}/screenshot" if self.screenshot_path else None,
+            "storageStateUrl": f"{base}/storage-state" if self.storage_state_path else None,
+            "createdAt": self.created_at,
+            "expiresAt": self.expires_at,
+        }
+
+
+class ReviewManager:
+    """Snapshots filled pages so the fill request can return immediately.
+
+    Each fill saves a full-page screenshot and the context's storage state
+    (cookies + localStorage) under REVIEW_DIR/<id>. A reviewer can view the
+    screenshot, or load the storage state into their own browser to resume
+    the session. With a headful pool the live page is also kept open, up to
+    REVIEW_MAX_LIVE at a time. Everything is dropped after REVIEW_TTL.
+    """
+
+    def __init__(self, ttl: int = REVIEW_TTL, keep_live: bool = REVIEW_KEEP_LIVE, max_live: int = REVIEW_MAX_LIVE):
+        self.ttl = ttl
+        self.keep_live = keep_live
+        self.max_live = max_live
+        self.sessions: Dict[str, ReviewSession] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def start(self, interval: float = 60.0):
+        # Sessions live in memory, so snapshots left by a previous run are orphans
+        shutil.rmtree(REVIEW_DIR, ignore_errors=True)
+        self._sweeper = asyncio.create_task(self._sweep_forever(interval))
+
+    async def stop(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    async def create(self, context, page, url: str, filled_count: int, failed_fields: List[str]) -> ReviewSession:
+        """Capture the filled page; call inside browser_pool.context() before it exits"""
+        session = ReviewSession(
+            id=uuid.uuid4().hex,
+            url=url,
+            filled_count=filled_count,
+            failed_fields=failed_fields,
+            expires_at=time.time() + self.ttl,
+        )
+        directory = os.path.join(REVIEW_DIR, session.id)
+        os.makedirs(directory, exist_ok=True)
+
+        try:
+            path = os.path.join(directory, "screenshot.png")
+            await page.screenshot(path=path, full_page=True)
+            session.screenshot_path = path
+        except Exception as e:
+            print(f"Review {session.id}: screenshot failed: {e}")
+        try:
+            path = os.path.join(directory, "storage-state.json")
+            await context.storage_state(path=path)
+            session.storage_state_path = path
+        except Exception as e:
+            print(f"Review {session.id}: storage state failed: {e}")
+
+        if self.keep_live:
+            browser_pool.keep(context)
+            session.context = context
+            self._limit_live()
+
+        self.sessions[session.id] = session
+        self.purge_expired()
+        return session
+
+    def get(self, review_id: str) -> Optional[ReviewSession]:
+        session = self.sessions.get(review_id)
+        if session and session.expires_at < time.time():
+            self.close(review_id)
+            return None
+        return session
+
+    def close(self, review_id: str) -> bool:
+        """Close the live page (if any) and delete the snapshot"""
+        session = self.sessions.pop(review_id, None)
+        if session is None:
+            return False
+        self._close_live(session)
+        shutil.rmtree(os.path.join(REVIEW_DIR, session.id), ignore_errors=True)
+        return True
+
+    def purge_expired(self):
+        now = time.time()
+        for review_id in [s.id for s in self.sessions.values() if s.expires_at < now]:
+            self.close(review_id)
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self.sessions),
+            "live": sum(1 for s in self.sessions.values() if s.live),
+            "ttl": self.ttl,
+        }
+
+    def _limit_live(self):
+        live = sorted((s for s in self.sessions.values() if s.live), key=lambda s: s.created_at)
+        for session in live[:max(0, len(live) + 1 - self.max_live)]:
+            self._close_live(session)
+
+    def _close_live(self, session: ReviewSession):
+        if session.context is not None:
+            browser_pool.close_later(session.context)
+            session.context = None
+
+    async def _sweep_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.purge_expired()
+
+
+review_manager = ReviewManager()
@@ -0,0 +1,124 @@
+import logging
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import OCR_ROI_MIN_AREA, OCR_ROI_TEXT_CROP, OCR_ROI_CARD_ASPECT, OCR_ROI_CARD_ASPECT_TOLERANCE
+
+logger = logging.getLogger(__name__)
+
+DETECT_WIDTH = 800  # Card/text detection runs on a downscaled copy
+
+
+def _order_corners(pts: np.ndarray) -> np.ndarray:
+    """Top-left, top-right, bottom-right, bottom-left"""
+    s = pts.sum(axis=1)
+    d = np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]], dtype=np.float32)
+
+
+def find_card(rgb: np.ndarray, min_area: float = OCR_ROI_MIN_AREA) -> Optional[np.ndarray]:
+    """Find the ID card in a photo; returns it cropped and perspective-corrected, or None.
+
+    Only a card-shaped quad counts: when the largest box is anything else (a
+    photographed page, a bordered form), cropping to it would drop whatever
+    lies outside, so the frame is left whole.
+    """
+    h, w = rgb.shape[:2]
+    scale = min(1.0, DETECT_WIDTH / w)
+    small = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else rgb
+
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)), iterations=2)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    frame_area = small.shape[0] * small.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        area = cv2.contourArea(contour)
+        if area < min_area * frame_area:
+            break
+        if area > 0.95 * frame_area:
+            continue  # The card already fills the frame
+
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4:
+            corners = _order_corners(approx.reshape(4, 2).astype(np.float32) / scale)
+        else:
+            # Rounded or partly occluded corners: fall back to the rotated bounding box
+            corners = _order_corners(cv2.boxPoints(cv2.minAreaRect(contour)) / scale)
+
+        tl, tr, br, bl = corners
+        out_w = int(max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl)))
+        out_h = int(max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr)))
+        if out_w < 50 or out_h < 50:
+            continue
+        aspect = max(out_w, out_h) / min(out_w, out_h)
+        if abs(aspect - OCR_ROI_CARD_ASPECT) > OCR_ROI_CARD_ASPECT_TOLERANCE:
+            logger.info(f"✂️  Largest box is not card-shaped (aspect {aspect:.2f}) - keeping the full frame")
+            return None
+
+        target = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(rgb, matrix, (out_w, out_h), flags=cv2.INTER_CUBIC)
+
+    return None
+
+
+def find_text_regions(rgb: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Text-line boxes (x, y, w, h) in full-resolution coordinates"""
+    h, w = rgb.shape[:2]
+    scale = min(1.0, DETECT_WIDTH / w)
+    small = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else rgb
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+
+    # Morphological gradient picks out character strokes; a wide close joins them into lines
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+    # Every contour, not just outer ones: text inside a bordered box or form is nested in the border's
+    contours, _ = cv2.findContours(lines, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    regions = []
+    for contour in contours:
+        x, y, bw, bh = cv2.boundingRect(contour)
+        if bw < 20 or bh < 8 or bw < bh:
+            continue
+        # Mostly-filled boxes are text; sparse ones are borders, photos or noise
+        if cv2.countNonZero(binary[y:y + bh, x:x + bw]) < 0.25 * bw * bh:
+            continue
+        regions.append((int(x / scale), int(y / scale), int(bw / scale), int(bh / scale)))
+
+    return sorted(regions, key=lambda r: (r[1], r[0]))
+
+
+def crop_to_regions(rgb: np.ndarray, regions: List[Tuple[int, int, int, int]], pad: int = 10) -> np.ndarray:
+    """Crop to the union of regions plus padding"""
+    h, w = rgb.shape[:2]
+    x0 = max(min(x for x, _, _, _ in regions) - pad, 0)
+    y0 = max(min(y for _, y, _, _ in regions) - pad, 0)
+    x1 = min(max(x + bw for x, _, bw, _ in regions) + pad, w)
+    y1 = min(max(y + bh for _, y, _, bh in regions) + pad, h)
+    return rgb[y0:y1, x0:x1]
+
+
+def locate_document(rgb: np.ndarray, text_crop: bool = OCR_ROI_TEXT_CROP) -> np.ndarray:
+    """Card crop + deskew, then optionally a tighter crop to the text block"""
+    before = rgb.shape[0] * rgb.shape[1]
+    try:
+        card = find_card(rgb)
+        if card is not None:
+            rgb = card
+
+        if text_crop:
+            regions = find_text_regions(rgb)
+            if regions:
+                rgb = crop_to_regions(rgb, regions)
+    except Exception as e:
+        logger.warning(f"⚠️  ROI detection failed, using full frame: {e}")
+        return rgb
+
+    after = rgb.shape[0] * rgb.shape[1]
+    logger.info(f"✂️  ROI: {before} -> {after} pixels ({after / before:.0%})")
+    return np.ascontiguousarray(rgb)
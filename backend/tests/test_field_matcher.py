@@ -0,0 +1,22 @@
+"""PDF forms fill every repeat of a field; web forms fill each key once."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from field_matcher import match_fields
+
+LABELS = ['Name', 'Applicant Name', 'Declarant Name', 'Father Name', 'Mother Name', 'Email']
+
+
+def keys(matches):
+    return [m.key if m else None for m in matches]
+
+
+def test_web_forms_use_each_key_once():
+    assert keys(match_fields(LABELS)) == ['name', None, None, 'fatherName', None, 'email']
+
+
+def test_pdf_forms_fill_repeated_fields():
+    assert keys(match_fields(LABELS, unique_keys=False)) == [
+        'name', 'name', 'name', 'fatherName', None, 'email']
@@ -0,0 +1,86 @@
+"""Scanned PDF pages are OCR'd whole: the ID-card crop is for photos only."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+fitz = pytest.importorskip("fitz")
+
+import extractor
+from pdf_extract import render_page
+from preprocessing import VariantPipeline
+from roi import find_card
+
+HEADER = "APPLICATION FOR BIRTH CERTIFICATE"
+
+
+def make_scanned_page(path: str):
+    """An A4 page with a header line above a large bordered box of text"""
+    with fitz.open() as doc:
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((60, 70), HEADER, fontsize=20)
+        box = fitz.Rect(40, 160, 555, 780)
+        page.draw_rect(box, color=(0, 0, 0), width=4)
+        for i, line in enumerate(["NAME: RAVI KUMAR", "DOB: 01/01/1990", "ADDRESS: 12 MAIN ROAD CHENNAI"]):
+            page.insert_text((80, 230 + 60 * i), line, fontsize=16)
+        # Image-only, like a scan: no text layer for the text backends to find
+        pix = page.get_pixmap(dpi=100)
+    with fitz.open() as doc:
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, pixmap=pix)
+        doc.save(path)
+
+
+class NullBackend:
+    name = "null"
+
+    def image_to_string(self, image, oem, psm):
+        return ""
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    path = str(tmp_path / "scan.pdf")
+    make_scanned_page(path)
+    return path
+
+
+def test_page_box_is_not_taken_for_a_card(scanned_pdf):
+    # Cropping to the bordered box would drop the header above it
+    assert find_card(render_page(scanned_pdf, 0)) is None
+
+
+def test_pdf_page_is_not_cropped(scanned_pdf, monkeypatch):
+    shapes = []
+    from_array = VariantPipeline.from_array.__func__
+
+    def spy(cls, rgb, roi=True):
+        pipeline = from_array(cls, rgb, roi)
+        shapes.append(pipeline.rgb.shape)
+        return pipeline
+
+    monkeypatch.setattr(VariantPipeline, "from_array", classmethod(spy))
+    monkeypatch.setattr(extractor, "get_ocr_backend", lambda: NullBackend())
+
+    extractor.ocr_pdf_page(scanned_pdf, 0)
+    assert shapes == [render_page(scanned_pdf, 0).shape]
+
+
+def _ocr_available() -> bool:
+    try:
+        extractor.get_ocr_backend().image_to_string(np.full((40, 40), 255, np.uint8), 3, 6)
+        return True
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _ocr_available(), reason="no working tesseract install")
+def test_header_outside_the_box_is_read(scanned_pdf, monkeypatch):
+    # The staged variants are enough for printed text; skip the exhaustive sweep
+    monkeypatch.setattr(extractor, "OCR_CASCADE_EXHAUSTIVE", False)
+    monkeypatch.setattr(extractor, "render_page", lambda path, index: render_page(path, index, dpi=150))
+    result = extractor.ocr_pdf_page(scanned_pdf, 0, keep_text=True)
+    assert any("BIRTH CERTIFICATE" in text.upper() for text in result.texts)
@@ -0,0 +1,36 @@
+"""The card crop only applies to card-shaped boxes; other photos keep the full frame."""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roi import find_card, locate_document
+
+
+def photo_of_box(width: int, height: int, text: str) -> np.ndarray:
+    """A light box with a dark border and a few text lines on a grey background"""
+    image = np.full((height + 400, width + 400, 3), 90, np.uint8)
+    cv2.rectangle(image, (200, 200), (200 + width, 200 + height), (245, 245, 245), -1)
+    cv2.rectangle(image, (200, 200), (200 + width, 200 + height), (20, 20, 20), 4)
+    for i in range(4):
+        cv2.putText(image, text, (250, 280 + 90 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    return image
+
+
+def test_card_is_cropped():
+    card = find_card(photo_of_box(856, 540, "NAME RAVI KUMAR"))
+    assert card is not None
+    height, width = card.shape[:2]
+    assert abs(width / height - 856 / 540) < 0.05
+
+
+def test_page_photo_keeps_text_outside_the_box():
+    image = photo_of_box(880, 1244, "NAME RAVI KUMAR")
+    cv2.putText(image, "APPLICATION FORM", (250, 120), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    assert find_card(image) is None
+    # The text crop still runs: from the heading above the box down to the text inside it
+    height = locate_document(image).shape[0]
+    assert height > 400
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from config import UPLOAD_CHUNK_SIZE
+from retention import retention_manager
+
+
+@dataclass
+class StoredUpload:
+    """An uploaded file saved under its content hash"""
+    filename: str  # As sent by the client; display only
+    path: str
+    sha256: str
+    size: int
+
+    def to_dict(self) -> dict:
+        return {"filename": self.filename, "path": self.path, "sha256": self.sha256, "size": self.size}
+
+
+async def save_upload(upload: UploadFile, dest_dir: str, max_bytes: int) -> StoredUpload:
+    """Stream an upload to dest_dir in chunks, hashing as it goes.
+
+    The file lands at <sha256><ext>, so concurrent uploads never overwrite
+    each other and identical uploads share one file. Anything larger than
+    max_bytes is rejected with 413 as soon as the limit is crossed.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds {max_bytes} bytes")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    ext = os.path.splitext(upload.filename or "")[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+
+        path = os.path.join(dest_dir, digest.hexdigest() + ext)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    retention_manager.track(path, size)
+    return StoredUpload(filename=upload.filename, path=path, sha256=digest.hexdigest(), size=size)
+
+
+class RequestSizeLimit:
+    """ASGI middleware capping request bodies, by path prefix, while they stream in.
+
+    FastAPI spools a multipart body to disk before the endpoint (and
+    save_upload) ever runs, so the cap has to sit in front of the parser. A
+    Content-Length over the limit is refused without reading; otherwise the
+    body is counted as it arrives (chunked bodies included) and the request
+    fails with 413 the moment it crosses the limit, so no more than the limit
+    is ever spooled.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def _limit(self, scope) -> Optional[int]:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return None
+        for prefix, limit in self.limits.items():
+            if scope["path"].startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit(scope)
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            return await JSONResponse(status_code=413, content={"detail": "Upload too large"})(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPException from body parsing, so this becomes the response
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from config import OCR_MAX_WORKERS, OCR_REQUEST_CONCURRENCY, EXTRACTION_WORKERS, PDF_PAGE_WORKERS, BATCH_WORKERS
+
+# Each tesseract process gets one core; the pool provides the parallelism.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# Threads are enough here: a pytesseract call spends its time waiting on a
+# tesseract subprocess, so the GIL is free while the work runs on other cores.
+# The pool size is the global cap on tesseract processes across all requests.
+ocr_executor = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS, thread_name_prefix="ocr")
+
+
+def run_jobs(executor: ThreadPoolExecutor, func: Callable, jobs: Iterable[tuple],
+             gate: threading.Semaphore) -> List:
+    """Run func(*job) for every job on executor, one gate slot each, results in job order.
+
+    jobs may be a generator: the next job is only pulled once a slot is free,
+    so whatever it builds (an image, say) is never made ahead of time.
+    """
+    futures = []
+    jobs = iter(jobs)
+    
+    while True:
+        gate.acquire()
+        job = next(jobs, None)
+        if job is None:
+            gate.release()
+            break
+        future = executor.submit(func, *job)
+        future.add_done_callback(lambda _: gate.release())
+        futures.append(future)
+    
+    return [future.result() for future in futures]
+
+
+def ocr_limiter(limit: int = OCR_REQUEST_CONCURRENCY) -> threading.Semaphore:
+    """One request's share of the OCR pool.
+
+    Create one per request (or job, or batch run) and pass it to every
+    run_ocr_jobs call the request makes - all its documents, stages and
+    pages - so together they never hold more than limit slots and one large
+    upload cannot fill the shared pool and starve other requests.
+    """
+    return threading.BoundedSemaphore(max(1, min(limit, OCR_MAX_WORKERS)))
+
+
+def run_ocr_jobs(func: Callable, jobs: Iterable[tuple], limiter: Optional[threading.Semaphore] = None) -> List:
+    """Run func(*job) for every job on the shared OCR pool, results in job order.
+
+    Each queued or running job holds a slot of limiter; without one, this
+    call gets a fresh OCR_REQUEST_CONCURRENCY share of its own.
+    """
+    return run_jobs(ocr_executor, func, jobs, limiter or ocr_limiter())
+
+# Scanned PDF pages: each task rasterizes one page and runs its OCR cascade.
+# Kept apart from ocr_executor, which these tasks themselves feed.
+pdf_page_executor = ThreadPoolExecutor(max_workers=PDF_PAGE_WORKERS, thread_name_prefix="pdf-page")
+
+
+def run_pdf_page_jobs(func: Callable, jobs: Sequence[tuple]) -> List:
+    """Run page jobs a few at a time, so only that many pages are decoded at once"""
+    return run_jobs(pdf_page_executor, func, jobs, threading.BoundedSemaphore(PDF_PAGE_WORKERS))
+
+
+# Whole-document extraction (OCR sweep + regex pass) runs here, never on the
+# event loop. Each task fans its OCR calls out to ocr_executor above.
+extraction_executor = ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS, thread_name_prefix="extract")
+
+
+async def run_extraction(func: Callable, *args):
+    """Await func(*args) on the extraction pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(extraction_executor, func, *args)
+
+
+# Batch runs: one task per applicant, each extracting its documents in turn.
+# All batches share this pool, and their OCR calls share ocr_executor.
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")